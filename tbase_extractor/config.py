@@ -1,6 +1,8 @@
 """Configuration constants and settings for tbase_extractor."""
 
 import os
+import re
+from types import MappingProxyType
 
 # Application constants
 APP_VERSION = "0.1.0"
@@ -16,8 +18,9 @@ LOGGER_NAME = "tbase_extractor.main"
 
 # File handling
 DEFAULT_FILE_ENCODING = "utf-8"
-VALID_OUTPUT_FORMATS = ["json", "csv", "tsv", "txt", "stdout"]
-FILE_EXTENSION_MAP = {".json": "json", ".csv": "csv", ".tsv": "tsv", ".txt": "txt"}
+VALID_OUTPUT_FORMATS = ("json", "csv", "tsv", "txt", "stdout")
+# Read-only view: lowercased file extension -> output format
+FILE_EXTENSION_MAP = MappingProxyType({".json": "json", ".csv": "csv", ".tsv": "tsv", ".txt": "txt"})
 
 # Database configuration defaults
 DEFAULT_SQL_DRIVER = "{SQL Server Native Client 10.0}"
@@ -44,7 +47,9 @@ STATUS_BATCH_NO_DATA = "batch_processed_no_data_or_all_failed"
 STATUS_BATCH_INPUT_ERROR = "batch_input_error_or_empty"
 
 # Filename sanitization
-VALID_FILENAME_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_")
+VALID_FILENAME_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_")
+# Matches every character outside VALID_FILENAME_CHARS, so one sub() call removes them all
+_INVALID_FILENAME_CHARS_RE = re.compile("[^" + re.escape("".join(sorted(VALID_FILENAME_CHARS))) + "]")
 
 
 def get_env_or_default(key: str, default: str = "") -> str:
@@ -54,4 +59,4 @@ def get_env_or_default(key: str, default: str = "") -> str:
 
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename by keeping only alphanumeric chars, dashes, and underscores."""
-    return "".join(c for c in filename if c in VALID_FILENAME_CHARS)
+    return _INVALID_FILENAME_CHARS_RE.sub("", filename)
@@ -5,7 +5,7 @@ import logging
 import os
 import sys
 from datetime import date, datetime
-from typing import Any, Callable, Dict, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 try:
     import pyodbc
@@ -16,11 +16,12 @@ from dotenv import load_dotenv
 from .matching import FuzzyMatcher, PatientSearchStrategy
 from .metadata import create_metadata_dict
 from .output_handler import handle_output
+from .secure_logging import configure_secure_logging, get_secure_logger
 from .sql_interface.db_interface import SQLInterface
 from .sql_interface.dynamic_query_manager import HybridQueryManager
 from .sql_interface.flexible_query_builder import FlexibleQueryManager
 from .sql_interface.query_manager import QueryManager, QueryTemplateNotFoundError
-from .utils import read_ids_from_csv, resolve_templates_dir
+from .utils import accepts_parameter, read_ids_from_csv, read_patient_data_from_csv, resolve_templates_dir
 
 load_dotenv()
 
@@ -439,8 +440,6 @@ def setup_logging(debug: bool = False, log_file: Optional[str] = None) -> None:
         debug: Enable debug level logging
         log_file: Optional log file path
     """
-    from .secure_logging import configure_secure_logging
-
     # Determine if we're in production mode (opposite of debug)
     production_mode = not debug
     log_level = logging.DEBUG if debug else logging.INFO
@@ -452,7 +451,13 @@ def setup_logging(debug: bool = False, log_file: Optional[str] = None) -> None:
     )
 
 
-def main():
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the command-line interface.
+
+    Args:
+        argv: Argument list to parse instead of ``sys.argv[1:]``, so the CLI can be
+            driven in-process (e.g. from tests) without spawning an interpreter.
+    """
     # 1. Setup (templates_dir, parser, args, logging)
     try:
         templates_dir = resolve_templates_dir()
@@ -461,15 +466,13 @@ def main():
         sys.exit(1)
 
     parser = setup_arg_parser()
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     debug = getattr(args, "debug", False)
     log_file = os.getenv("SQL_APP_LOGFILE", None)
     setup_logging(debug, log_file)  # Ensure logger is configured
 
     # Use secure logger for main application
-    from .secure_logging import get_secure_logger
-
     logger = get_secure_logger("tbase_extractor.main", production_mode=not debug)
 
     # Log application startup (without sensitive argument details)
@@ -658,10 +661,9 @@ def handle_list_tables(
 
     # Check if we're using dynamic query manager
     use_dynamic = getattr(args, "use_dynamic_builder", False)
-    if (
-        hasattr(query_manager, "get_list_tables_query")
-        and hasattr(query_manager.get_list_tables_query, "__code__")
-        and "use_dynamic" in query_manager.get_list_tables_query.__code__.co_varnames
+    if accepts_parameter(
+        getattr(query_manager, "get_list_tables_query", None),
+        "use_dynamic",
     ):
         sql, params = query_manager.get_list_tables_query(use_dynamic=use_dynamic)
     else:
@@ -742,9 +744,9 @@ def handle_get_patient_by_id(
 
             # Check if we're using dynamic query manager and pass include_diagnoses parameter
             include_diagnoses = getattr(args, "include_diagnoses", False)
-            if (
-                hasattr(query_manager, "get_patient_by_id_query")
-                and "include_diagnoses" in query_manager.get_patient_by_id_query.__code__.co_varnames
+            if accepts_parameter(
+                getattr(query_manager, "get_patient_by_id_query", None),
+                "include_diagnoses",
             ):
                 sql, params = query_manager.get_patient_by_id_query(
                     current_patient_id,
@@ -806,9 +808,9 @@ def handle_get_patient_by_id(
 
         # Check if we're using dynamic query manager and pass include_diagnoses parameter
         include_diagnoses = getattr(args, "include_diagnoses", False)
-        if (
-            hasattr(query_manager, "get_patient_by_id_query")
-            and "include_diagnoses" in query_manager.get_patient_by_id_query.__code__.co_varnames
+        if accepts_parameter(
+            getattr(query_manager, "get_patient_by_id_query", None),
+            "include_diagnoses",
         ):
             sql, params = query_manager.get_patient_by_id_query(
                 args.patient_id,
@@ -865,9 +867,9 @@ def handle_patient_by_name_dob(
 
     # Check if we're using dynamic query manager and pass include_diagnoses parameter
     include_diagnoses = getattr(args, "include_diagnoses", False)
-    if (
-        hasattr(query_manager, "get_patient_by_name_dob_query")
-        and "include_diagnoses" in query_manager.get_patient_by_name_dob_query.__code__.co_varnames
+    if accepts_parameter(
+        getattr(query_manager, "get_patient_by_name_dob_query", None),
+        "include_diagnoses",
     ):
         sql, params = query_manager.get_patient_by_name_dob_query(
             args.first_name,
@@ -1228,8 +1230,6 @@ def handle_batch_search_demographics(
     )
 
     # Read demographics data from CSV
-    from .utils import read_patient_data_from_csv
-
     patients_data = read_patient_data_from_csv(
         args.input_csv,
         args.fn_column,
@@ -1285,9 +1285,9 @@ def handle_batch_search_demographics(
                 continue
             # Check if we're using dynamic query manager and pass include_diagnoses parameter
             include_diagnoses = getattr(args, "include_diagnoses", False)
-            if (
-                hasattr(query_manager, "get_patient_by_name_dob_query")
-                and "include_diagnoses" in query_manager.get_patient_by_name_dob_query.__code__.co_varnames
+            if accepts_parameter(
+                getattr(query_manager, "get_patient_by_name_dob_query", None),
+                "include_diagnoses",
             ):
                 sql, params = query_manager.get_patient_by_name_dob_query(
                     first_name,
@@ -1,12 +1,13 @@
 """Patient matching functionality for fuzzy search capabilities."""
 
 from .fuzzy_matchers import FuzzyMatcher
-from .models import MatchCandidate, MatchInfo
+from .models import MatchCandidate, MatchInfo, ScoreTable
 from .search_strategy import DEFAULT_PATIENT_SEARCH_CONFIG, PatientSearchStrategy
 
 __all__ = [
     "MatchInfo",
     "MatchCandidate",
+    "ScoreTable",
     "FuzzyMatcher",
     "PatientSearchStrategy",
     "DEFAULT_PATIENT_SEARCH_CONFIG",
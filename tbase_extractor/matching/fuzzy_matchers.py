@@ -1,12 +1,23 @@
 """Fuzzy matching utilities for patient data comparison."""
 
+import functools
 from datetime import date
-from typing import Optional
+from typing import Callable, Optional
 
 from rapidfuzz import fuzz  # Or your chosen fuzzy matching library
 
 from .models import MatchInfo
 
+# Upper bound on normalized names cached per matcher; DB-side names repeat across many comparisons
+NAME_CACHE_SIZE = 100_000
+# Upper bound on name-pair scores cached per matcher; frequent names recur across input rows
+SIMILARITY_CACHE_SIZE = 65_536
+
+
+def _normalize_name(name: str) -> str:
+    """Strip and lowercase a name for comparison."""
+    return name.strip().lower()
+
 
 class FuzzyMatcher:
     """Handles fuzzy matching for patient name and date comparisons."""
@@ -15,17 +26,44 @@ class FuzzyMatcher:
         self,
         string_similarity_threshold: float = 0.85,
         date_year_tolerance: int = 1,
+        scorer: Callable[..., float] = fuzz.WRatio,
     ):
-        """Initialize fuzzy matcher with similarity thresholds."""
+        """
+        Initialize fuzzy matcher with similarity thresholds.
+
+        Args:
+            string_similarity_threshold: Minimum similarity (0.0-1.0) for a fuzzy name match
+            date_year_tolerance: Maximum year difference reported as a year mismatch
+            scorer: rapidfuzz scorer returning a 0-100 score (e.g. ``fuzz.ratio``);
+                defaults to ``fuzz.WRatio``
+        """
         if not (0.0 <= string_similarity_threshold <= 1.0):
             raise ValueError("string_similarity_threshold must be between 0.0 and 1.0")
         self.string_similarity_threshold = string_similarity_threshold
         self.date_year_tolerance = date_year_tolerance
+        self.scorer = scorer
+        # Caches live as long as the matcher (one search or batch), so patient names
+        # are not retained process-wide after it is discarded
+        self._normalize_name = functools.lru_cache(maxsize=NAME_CACHE_SIZE)(_normalize_name)
+        self._scored_pair = functools.lru_cache(maxsize=SIMILARITY_CACHE_SIZE)(scorer)
+
+    def clear_caches(self) -> None:
+        """Drop the cached normalized names and name-pair scores held by this matcher."""
+        self._normalize_name.cache_clear()
+        self._scored_pair.cache_clear()
 
     def calculate_string_similarity(self, str1: str, str2: str) -> float:
         """Calculate similarity ratio between two strings."""
-        # rapidfuzz.fuzz.WRatio handles empty strings gracefully, returning 0.0
-        return fuzz.WRatio(str1, str2) / 100.0
+        # Settle the trivial cases without calling into rapidfuzz. Empty input scores
+        # 0.0 (as rapidfuzz.fuzz.WRatio does, even for two empty strings), identical
+        # non-empty strings score 1.0.
+        if not str1 or not str2:
+            return 0.0
+        if str1 == str2:
+            return 1.0
+        # No length-ratio cutoff: scorers like WRatio take partial matches into account,
+        # so strings of very different lengths can still score high.
+        return self.scorer(str1, str2) / 100.0
 
     def compare_names(
         self,
@@ -34,8 +72,8 @@ class FuzzyMatcher:
         db_name: Optional[str],
     ) -> MatchInfo:
         """Compare two names and return match information."""
-        input_name_clean = (input_name or "").strip().lower()
-        db_name_clean = (db_name or "").strip().lower()
+        input_name_clean = self._normalize_name(input_name or "")
+        db_name_clean = self._normalize_name(db_name or "")
 
         if not input_name_clean:  # Input name not provided or empty
             return MatchInfo(
@@ -57,7 +95,8 @@ class FuzzyMatcher:
         if input_name_clean == db_name_clean:
             return MatchInfo(field_name, input_name, db_name, "Exact", 1.0)
 
-        similarity = self.calculate_string_similarity(input_name_clean, db_name_clean)
+        # Pairs are not canonicalized: custom scorers need not be symmetric
+        similarity = self._scored_pair(input_name_clean, db_name_clean) / 100.0
         if similarity >= self.string_similarity_threshold:
             return MatchInfo(field_name, input_name, db_name, "Fuzzy", similarity)
         else:
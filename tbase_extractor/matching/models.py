@@ -1,12 +1,36 @@
 """Data models for patient matching functionality."""
 
+import math
+import sys
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Mapping, Optional, Union
 
+# dataclass(slots=True) needs Python 3.10; older interpreters keep a per-instance __dict__
+DATACLASS_SLOTS: Dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+# score_mapping value meaning "score with the field's similarity", and its ScoreTable sentinel
+USE_SIMILARITY = "use_similarity"
+USE_SIMILARITY_SENTINEL = math.nan
+
+
+class ScoreTable(Dict[str, float]):
+    """A score_mapping resolved to floats, with USE_SIMILARITY_SENTINEL for similarity-scored types."""
+
+    @classmethod
+    def from_mapping(cls, score_mapping: Mapping[str, Union[float, str]]) -> "ScoreTable":
+        """Resolve a score_mapping; values other than numbers and USE_SIMILARITY score 0.0."""
+        table = cls()
+        for match_type, score_source in score_mapping.items():
+            if score_source == USE_SIMILARITY:
+                table[match_type] = USE_SIMILARITY_SENTINEL
+            elif isinstance(score_source, (int, float)):
+                table[match_type] = float(score_source)
+        return table
+
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class MatchInfo:
-    """Information about a field match comparison."""
+    """Information about a field match comparison (immutable and hashable)."""
 
     field_name: str
     input_value: Any
@@ -16,7 +40,7 @@ class MatchInfo:
     details: Optional[str] = None
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class MatchCandidate:
     """A candidate match for patient record with scoring information."""
 
@@ -32,22 +56,23 @@ class MatchCandidate:
         field_weights: Mapping[str, float],
         score_mapping: Mapping[str, Union[float, str]],  # Allow both float and string values
     ) -> None:
-        """Calculate overall match score and determine primary match type."""
+        """Calculate overall match score and determine primary match type.
+
+        Callers scoring many candidates with the same score_mapping can pass a
+        ScoreTable built once with ScoreTable.from_mapping.
+        """
         calculated_score = 0.0
         field_match_summaries = []
         num_exact_matches_for_weighted_fields = 0
         num_weighted_fields_considered = 0
 
+        score_table = score_mapping if isinstance(score_mapping, ScoreTable) else ScoreTable.from_mapping(score_mapping)
+
         for info in self.match_fields_info:
             weight = field_weights.get(info.field_name, 0.0)
-            base_score = 0.0
-
-            if info.match_type in score_mapping:
-                score_source = score_mapping[info.match_type]
-                if isinstance(score_source, str) and score_source == "use_similarity":
-                    base_score = info.similarity_score if info.similarity_score is not None else 0.0
-                elif isinstance(score_source, (int, float)):
-                    base_score = float(score_source)
+            base_score = score_table.get(info.match_type, 0.0)
+            if base_score != base_score:  # USE_SIMILARITY_SENTINEL (NaN)
+                base_score = info.similarity_score if info.similarity_score is not None else 0.0
 
             calculated_score += base_score * weight
 
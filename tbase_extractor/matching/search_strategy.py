@@ -6,8 +6,9 @@ from typing import Any, Dict, List, Optional, Tuple
 
 from ..sql_interface.db_interface import SQLInterface
 from ..sql_interface.query_manager import QueryManager
+from ..utils import accepts_parameter
 from .fuzzy_matchers import FuzzyMatcher
-from .models import MatchCandidate
+from .models import MatchCandidate, ScoreTable
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +56,9 @@ class PatientSearchStrategy:
             if map_key not in self.config["db_column_map"]:
                 raise ValueError(f"db_column_map in config is missing required key: {map_key}")
 
+        # Resolved once; every candidate is scored with the same mapping
+        self._score_table = ScoreTable.from_mapping(self.config["score_mapping"])
+
     def _fetch_candidates_from_db(
         self,
         query: str,
@@ -116,7 +120,7 @@ class PatientSearchStrategy:
 
         candidate.calculate_overall_score_and_type(
             field_weights=self.config["field_weights"],
-            score_mapping=self.config["score_mapping"],
+            score_mapping=self._score_table,
         )
         return candidate
 
@@ -141,9 +145,9 @@ class PatientSearchStrategy:
             start_year = dob_search.year - self.fuzzy_matcher.date_year_tolerance
             end_year = dob_search.year + self.fuzzy_matcher.date_year_tolerance
             # Check if query manager supports include_diagnoses parameter
-            if (
-                hasattr(self.query_manager, "get_patients_by_dob_year_range_query")
-                and "include_diagnoses" in self.query_manager.get_patients_by_dob_year_range_query.__code__.co_varnames
+            if accepts_parameter(
+                getattr(self.query_manager, "get_patients_by_dob_year_range_query", None),
+                "include_diagnoses",
             ):
                 candidate_sql, candidate_params = self.query_manager.get_patients_by_dob_year_range_query(
                     start_year,
@@ -158,9 +162,9 @@ class PatientSearchStrategy:
             logger.info(f"Candidate SQL strategy: DOB year range ({start_year}-{end_year}).")
         elif ln_search and isinstance(ln_search, str):
             # Check if query manager supports include_diagnoses parameter
-            if (
-                hasattr(self.query_manager, "get_patients_by_lastname_like_query")
-                and "include_diagnoses" in self.query_manager.get_patients_by_lastname_like_query.__code__.co_varnames
+            if accepts_parameter(
+                getattr(self.query_manager, "get_patients_by_lastname_like_query", None),
+                "include_diagnoses",
             ):
                 candidate_sql, candidate_params = self.query_manager.get_patients_by_lastname_like_query(
                     ln_search,
@@ -175,9 +179,9 @@ class PatientSearchStrategy:
                 "Falling back to fetching ALL patients. This can be very slow on large databases.",
             )
             # Check if query manager supports include_diagnoses parameter
-            if (
-                hasattr(self.query_manager, "get_all_patients_query")
-                and "include_diagnoses" in self.query_manager.get_all_patients_query.__code__.co_varnames
+            if accepts_parameter(
+                getattr(self.query_manager, "get_all_patients_query", None),
+                "include_diagnoses",
             ):
                 candidate_sql, candidate_params = self.query_manager.get_all_patients_query(
                     include_diagnoses=include_diagnoses,
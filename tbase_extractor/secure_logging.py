@@ -157,6 +157,10 @@ class SecureLogger:
         except Exception:
             return "<error parsing SQL>"
 
+    def isEnabledFor(self, level: int) -> bool:
+        """Return whether the wrapped logger handles messages of ``level``."""
+        return self.logger.isEnabledFor(level)
+
     def debug(self, message: str, **kwargs: Any) -> None:
         """Log debug message with security filtering."""
         if self.logger.isEnabledFor(logging.DEBUG):
@@ -1,10 +1,11 @@
 """Database interface module for SQL Server connections."""
 
+import functools
 import html
 import os
 import re
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 try:
     import pyodbc
@@ -23,17 +24,49 @@ from ..secure_logging import get_secure_logger
 # Initialize secure logger
 logger = get_secure_logger(__name__)
 
+# Patterns used to clean fetched field values, compiled once for all cells
+_BR_TAG_RE = re.compile(r"<br\s*/?>", re.IGNORECASE)
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+# Upper bound on cleaned values cached per SQLInterface; coded and repeated text cells recur across rows
+CLEAN_CACHE_SIZE = 4096
+
+
+def _clean_html_text(value: str) -> str:
+    """Unescape entities and strip tags from a string that may contain HTML."""
+    # First, unescape HTML entities (e.g., Ä -> Ä)
+    text = html.unescape(value)
+
+    # Replace <br> tags with newlines
+    text = _BR_TAG_RE.sub("\n", text)
+
+    # Remove all other HTML tags using BeautifulSoup if available
+    if BeautifulSoup is not None:
+        text = BeautifulSoup(text, "html.parser").get_text(separator="\n")
+    else:
+        # Fallback: simple HTML tag removal using regex
+        text = _HTML_TAG_RE.sub("", text)  # type: ignore[unreachable]
+
+    # Normalize multiple consecutive newlines to a single newline
+    text = _BLANK_LINES_RE.sub("\n", text)
+
+    # Remove leading and trailing whitespace
+    return text.strip()
+
 
 class SQLInterface:
     """Handles database connection, query execution, and result fetching."""
 
     @staticmethod
-    def _clean_field_value(value: Any) -> Any:
+    def _clean_field_value(value: Any, clean_html: Callable[[str], str] = _clean_html_text) -> Any:
         """
         Cleans a field value by removing HTML tags and standardizing newlines.
 
         Args:
             value (Any): The value to clean, typically a string from a database field.
+            clean_html (Callable[[str], str]): Cleans strings that may contain HTML;
+                                               fetches pass the instance's cached cleaner.
 
         Returns:
             Any: The cleaned value if the input was a string, otherwise the original value.
@@ -41,27 +74,23 @@ class SQLInterface:
         if not isinstance(value, str):
             return value
 
-        # First, unescape HTML entities (e.g., Ä -> Ä)
-        text = html.unescape(value)
+        # Most cells are plain text: without "&" or "<" there are no entities or tags,
+        # so only the newline normalization and stripping can change the value
+        if "&" not in value and "<" not in value:
+            return _BLANK_LINES_RE.sub("\n", value).strip() if "\n" in value else value.strip()
 
-        # Replace <br> tags with newlines
-        text = re.sub(r"<br\s*/?>", "\n", text, flags=re.IGNORECASE)
+        return clean_html(value)
 
-        # Remove all other HTML tags using BeautifulSoup if available
-        if BeautifulSoup is not None:
-            text = BeautifulSoup(text, "html.parser").get_text(separator="\n")
-        else:
-            # Fallback: simple HTML tag removal using regex
-            text = re.sub(r"<[^>]+>", "", text)  # type: ignore[unreachable]
-
-        # Normalize multiple consecutive newlines to a single newline
-        text = re.sub(r"\n\s*\n+", "\n", text)
+    def __init__(self, debug: bool = False):
+        """
+        Initializes connection parameters from environment variables.
 
-        # Remove leading and trailing whitespace
-        return text.strip()
+        Args:
+            debug (bool): Enable debug logging.
 
-    def __init__(self, debug: bool = False):
-        """Initializes connection parameters from environment variables."""
+        ODBC connection pooling is pyodbc's process-wide ``pyodbc.pooling`` setting
+        (enabled by default); it is left to application setup rather than set per connection.
+        """
         self.server: Optional[str] = os.getenv("SQL_SERVER")
         self.database: Optional[str] = os.getenv("DATABASE")
         self.username_sql: Optional[str] = os.getenv("USERNAME_SQL")
@@ -71,6 +100,8 @@ class SQLInterface:
         self.connection: Optional[pyodbc.Connection] = None
         self.cursor: Optional[pyodbc.Cursor] = None
         self.debug = debug
+        # Cleaned cell values are patient data, so the cache lives and is cleared with this instance
+        self._clean_html_text = functools.lru_cache(maxsize=CLEAN_CACHE_SIZE)(_clean_html_text)
 
     def __enter__(self):
         """Context manager entry point: establishes connection."""
@@ -170,6 +201,11 @@ class SQLInterface:
         Handles potential pyodbc errors during execution and attempts rollback.
         Requires explicit call to commit() for DML operations (INSERT, UPDATE, DELETE).
 
+        All queries run on the single cursor opened in connect(). pyodbc keeps the
+        last statement prepared on that cursor, so executing the same SQL string again
+        with different parameters skips re-preparation; callers should therefore pass
+        the SQL text unchanged and put every varying value into ``params``.
+
         Args:
             query (str): The SQL query string with '?' placeholders for parameters.
             params (Tuple): A tuple of parameter values corresponding to the placeholders.
@@ -224,39 +260,67 @@ class SQLInterface:
             return None
 
         try:
-            # Check if the last execution produced a result set
+            # Built from iter_results, so only one fetchmany batch of raw rows is held
+            # next to the cleaned dictionaries instead of the whole fetchall() result
+            return list(self.iter_results())
+        except Exception:
+            # iter_results has already logged the error
+            return None
+
+    def iter_results(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the results of the last executed query one cleaned row at a time.
+
+        Rows are fetched with cursor.fetchmany(batch_size), so only one batch is held
+        in memory. Use this instead of fetch_results for large extracts; a query that
+        produced no result set (e.g. INSERT/UPDATE/DELETE) yields no rows.
+
+        Args:
+            batch_size (int): Number of rows to fetch from the cursor per round trip.
+
+        Yields:
+            Dict[str, Any]: One row, keyed by column name, with string values cleaned.
+
+        Raises:
+            Exception: Errors raised by the cursor while fetching are logged and re-raised,
+                       so a partially consumed result is never mistaken for a complete one.
+        """
+        if not self.cursor:
+            logger.error("No cursor available to fetch results.")
+            return
+
+        try:
             if self.cursor.description is None:
-                # This typically means it wasn't a SELECT or the SELECT failed before producing results.
-                # It could also be a successful INSERT/UPDATE/DELETE.
-                return []
+                return
 
-            columns = [column[0] for column in self.cursor.description]
-            # Fetch all rows from the cursor
+            columns = tuple(column[0] for column in self.cursor.description)
+            clean = functools.partial(self._clean_field_value, clean_html=self._clean_html_text)
             start_time = time.time()
-            rows = self.cursor.fetchall()
-            duration_ms = (time.time() - start_time) * 1000
+            row_count = 0
+            while True:
+                rows = self.cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                row_count += len(rows)
+                for row in rows:
+                    yield dict(zip(columns, map(clean, row)))
 
-            row_count = len(rows)
+            duration_ms = (time.time() - start_time) * 1000
             logger.log_database_operation("FETCH", success=True, duration_ms=duration_ms, row_count=row_count)
 
-            # Convert rows to list of dictionaries, cleaning any string values
-            cleaned_results = []
-            for row in rows:
-                cleaned_row = {}
-                for col, val in zip(columns, row):
-                    cleaned_row[col] = self._clean_field_value(val)
-                cleaned_results.append(cleaned_row)
-            return cleaned_results
-
         except Exception as ex:
-            # Catch errors specifically during fetch or description access
-            if pyodbc and hasattr(ex, "args") and len(ex.args) >= 2:
-                # This is a pyodbc.Error
-                sqlstate = ex.args[0]
-                logger.error(f"Error fetching results from cursor: SQLSTATE {sqlstate} - {ex.args[1]}")
-            else:
-                logger.error(f"Error fetching results from cursor: {ex}")
-            return None
+            self._log_fetch_error(ex)
+            raise
+
+    @staticmethod
+    def _log_fetch_error(ex: Exception) -> None:
+        """Logs an error raised while fetching from the cursor."""
+        if pyodbc and hasattr(ex, "args") and len(ex.args) >= 2:
+            # This is a pyodbc.Error
+            sqlstate = ex.args[0]
+            logger.error(f"Error fetching results from cursor: SQLSTATE {sqlstate} - {ex.args[1]}")
+        else:
+            logger.error(f"Error fetching results from cursor: {ex}")
 
     def commit(self) -> bool:
         """
@@ -291,23 +355,20 @@ class SQLInterface:
 
     def close_connection(self) -> None:
         """Closes the database cursor and connection if they are open."""
+        # Cleaned values are only worth keeping while this connection's queries run
+        self._clean_html_text.cache_clear()
         if self.debug:
             logger.debug("Closing database connection and cursor...")
-        if self.cursor:
-            try:
-                self.cursor.close()
-            except Exception as ex:
-                logger.warning(f"Error closing cursor: {ex}")
-            finally:
-                self.cursor = None  # Ensure cursor is None regardless of close success
-
-        if self.connection:
+        # Cursor first, then connection; each is set to None regardless of close success.
+        # Pending changes are not rolled back implicitly before closing.
+        for attr in ("cursor", "connection"):
+            handle = getattr(self, attr)
+            if handle is None:
+                continue
             try:
-                # Rollback any pending changes before closing if not explicitly committed/rolled back
-                # self._rollback() # Optional: Decide if implicit rollback on close is desired
-                self.connection.close()
-                logger.info("Connection closed.")
+                handle.close()
+                if attr == "connection":
+                    logger.info("Connection closed.")
             except Exception as ex:
-                logger.warning(f"Error closing connection: {ex}")
-            finally:
-                self.connection = None  # Ensure connection is None regardless of close success
+                logger.warning(f"Error closing {attr}: {ex}")
+            setattr(self, attr, None)
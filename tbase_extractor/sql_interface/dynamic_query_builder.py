@@ -1,8 +1,9 @@
 """Dynamic SQL query builder for runtime query generation."""
 
+import sys
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 
 class JoinType(Enum):
@@ -64,6 +65,9 @@ class ColumnConfig:
 class JoinConfig:
     """Configuration for table joins."""
 
+    # No field defaults, so the dataclass can use slots instead of a per-instance __dict__
+    __slots__ = ("table", "join_type", "on_condition")
+
     table: TableConfig
     join_type: JoinType
     on_condition: str
@@ -169,6 +173,25 @@ class DynamicQueryBuilder:
         return sql, tuple(self._parameters)
 
 
+# Columns returned by the patient lookups (table alias "p")
+PATIENT_COLUMNS = (
+    ColumnConfig("PatientID", "p"),
+    ColumnConfig("Vorname", "p"),
+    ColumnConfig("Name", "p"),
+    ColumnConfig("Geburtsdatum", "p"),
+    ColumnConfig("Grunderkrankung", "p"),
+    ColumnConfig("ET_Grunderkrankung", "p"),
+    ColumnConfig("Dauernotiz", "p"),
+    ColumnConfig("Dauernotiz_Diagnose", "p"),
+)
+
+# Columns added when diagnoses are joined in (table alias "d")
+DIAGNOSIS_COLUMNS = (
+    ColumnConfig("ICD10", "d"),
+    ColumnConfig("Bezeichnung", "d", "DiagnoseBezeichnung"),
+)
+
+
 class PatientQueryBuilder:
     """Specialized query builder for patient-related queries."""
 
@@ -183,35 +206,43 @@ class PatientQueryBuilder:
         self.diagnose_table = TableConfig(name=diagnose_table, schema=schema, alias="d")
         self.builder = DynamicQueryBuilder()
 
-    def get_patient_by_id_query(
+        # The SQL text of each query only depends on the table configuration and on
+        # include_diagnoses, so it is compiled once here; calls only bind parameters.
+        self._compiled_sql: Dict[Tuple[str, bool], str] = {}
+        for include_diagnoses in (False, True):
+            self._compiled_sql[("by_id", include_diagnoses)] = self._compile(
+                include_diagnoses,
+                where_condition="p.PatientID = ?",
+            )
+            self._compiled_sql[("by_name_dob", include_diagnoses)] = self._compile(
+                include_diagnoses,
+                where_condition="p.Vorname = ? AND p.Name = ? AND p.Geburtsdatum = ?",
+            )
+            self._compiled_sql[("all", include_diagnoses)] = self._compile(include_diagnoses, select_all=True)
+            self._compiled_sql[("by_lastname_like", include_diagnoses)] = self._compile(
+                include_diagnoses,
+                where_condition="p.Name LIKE ?",
+            )
+
+    def _compile(
         self,
-        patient_id: int,
-        include_diagnoses: bool = False,
-    ) -> Tuple[str, Tuple[Any, ...]]:
-        """Build query to get patient by ID."""
+        include_diagnoses: bool,
+        where_condition: Optional[str] = None,
+        select_all: bool = False,
+        limit: Optional[int] = None,
+    ) -> str:
+        """Build the SQL text for one query shape using the underlying DynamicQueryBuilder."""
         self.builder.reset()
 
-        # Define patient columns
-        patient_columns = [
-            ColumnConfig("PatientID", "p"),
-            ColumnConfig("Vorname", "p"),
-            ColumnConfig("Name", "p"),
-            ColumnConfig("Geburtsdatum", "p"),
-            ColumnConfig("Grunderkrankung", "p"),
-            ColumnConfig("ET_Grunderkrankung", "p"),
-            ColumnConfig("Dauernotiz", "p"),
-            ColumnConfig("Dauernotiz_Diagnose", "p"),
-        ]
-
-        self.builder.select(patient_columns).from_table(self.patient_table)
+        if select_all:
+            self.builder.select_all_from_table("p")
+        else:
+            self.builder.select(list(PATIENT_COLUMNS))
+        self.builder.from_table(self.patient_table)
 
         # Add diagnosis join if requested
         if include_diagnoses:
-            diagnosis_columns = [
-                ColumnConfig("ICD10", "d"),
-                ColumnConfig("Bezeichnung", "d", "DiagnoseBezeichnung"),
-            ]
-            self.builder.select(diagnosis_columns)
+            self.builder.select(list(DIAGNOSIS_COLUMNS))
 
             join_config = JoinConfig(
                 table=self.diagnose_table,
@@ -220,9 +251,23 @@ class PatientQueryBuilder:
             )
             self.builder.join(join_config)
 
-        self.builder.where("p.PatientID = ?", patient_id)
+        if where_condition:
+            self.builder.where(where_condition)
 
-        return self.builder.build()
+        if limit:
+            self.builder.limit(limit)
+
+        sql, _params = self.builder.build()
+        # Interned so builders with the same table configuration share one SQL string object
+        return sys.intern(sql)
+
+    def get_patient_by_id_query(
+        self,
+        patient_id: int,
+        include_diagnoses: bool = False,
+    ) -> Tuple[str, Tuple[Any, ...]]:
+        """Build query to get patient by ID."""
+        return self._compiled_sql[("by_id", bool(include_diagnoses))], (patient_id,)
 
     def get_patient_by_name_dob_query(
         self,
@@ -232,45 +277,7 @@ class PatientQueryBuilder:
         include_diagnoses: bool = False,
     ) -> Tuple[str, Tuple[Any, ...]]:
         """Build query to get patient by name and DOB."""
-        self.builder.reset()
-
-        # Define patient columns
-        patient_columns = [
-            ColumnConfig("PatientID", "p"),
-            ColumnConfig("Vorname", "p"),
-            ColumnConfig("Name", "p"),
-            ColumnConfig("Geburtsdatum", "p"),
-            ColumnConfig("Grunderkrankung", "p"),
-            ColumnConfig("ET_Grunderkrankung", "p"),
-            ColumnConfig("Dauernotiz", "p"),
-            ColumnConfig("Dauernotiz_Diagnose", "p"),
-        ]
-
-        self.builder.select(patient_columns).from_table(self.patient_table)
-
-        # Add diagnosis join if requested
-        if include_diagnoses:
-            diagnosis_columns = [
-                ColumnConfig("ICD10", "d"),
-                ColumnConfig("Bezeichnung", "d", "DiagnoseBezeichnung"),
-            ]
-            self.builder.select(diagnosis_columns)
-
-            join_config = JoinConfig(
-                table=self.diagnose_table,
-                join_type=JoinType.LEFT,
-                on_condition="p.PatientID = d.PatientID",
-            )
-            self.builder.join(join_config)
-
-        self.builder.where(
-            "p.Vorname = ? AND p.Name = ? AND p.Geburtsdatum = ?",
-            first_name,
-            last_name,
-            dob,
-        )
-
-        return self.builder.build()
+        return self._compiled_sql[("by_name_dob", bool(include_diagnoses))], (first_name, last_name, dob)
 
     def get_all_patients_query(
         self,
@@ -278,29 +285,10 @@ class PatientQueryBuilder:
         limit: Optional[int] = None,
     ) -> Tuple[str, Tuple[Any, ...]]:
         """Build query to get all patients."""
-        self.builder.reset()
-
-        self.builder.select_all_from_table("p").from_table(self.patient_table)
-
-        # Add diagnosis join if requested
-        if include_diagnoses:
-            diagnosis_columns = [
-                ColumnConfig("ICD10", "d"),
-                ColumnConfig("Bezeichnung", "d", "DiagnoseBezeichnung"),
-            ]
-            self.builder.select(diagnosis_columns)
-
-            join_config = JoinConfig(
-                table=self.diagnose_table,
-                join_type=JoinType.LEFT,
-                on_condition="p.PatientID = d.PatientID",
-            )
-            self.builder.join(join_config)
-
         if limit:
-            self.builder.limit(limit)
-
-        return self.builder.build()
+            # TOP n is part of the SQL text, so limited queries are built on demand
+            return self._compile(bool(include_diagnoses), select_all=True, limit=limit), ()
+        return self._compiled_sql[("all", bool(include_diagnoses))], ()
 
     def get_patients_by_lastname_like_query(
         self,
@@ -308,43 +296,11 @@ class PatientQueryBuilder:
         include_diagnoses: bool = False,
     ) -> Tuple[str, Tuple[Any, ...]]:
         """Build query to get patients by lastname pattern."""
-        self.builder.reset()
-
-        patient_columns = [
-            ColumnConfig("PatientID", "p"),
-            ColumnConfig("Vorname", "p"),
-            ColumnConfig("Name", "p"),
-            ColumnConfig("Geburtsdatum", "p"),
-            ColumnConfig("Grunderkrankung", "p"),
-            ColumnConfig("ET_Grunderkrankung", "p"),
-            ColumnConfig("Dauernotiz", "p"),
-            ColumnConfig("Dauernotiz_Diagnose", "p"),
-        ]
-
-        self.builder.select(patient_columns).from_table(self.patient_table)
-
-        # Add diagnosis join if requested
-        if include_diagnoses:
-            diagnosis_columns = [
-                ColumnConfig("ICD10", "d"),
-                ColumnConfig("Bezeichnung", "d", "DiagnoseBezeichnung"),
-            ]
-            self.builder.select(diagnosis_columns)
-
-            join_config = JoinConfig(
-                table=self.diagnose_table,
-                join_type=JoinType.LEFT,
-                on_condition="p.PatientID = d.PatientID",
-            )
-            self.builder.join(join_config)
-
         # Add wildcard if not present
         if not any(c in lastname_pattern for c in ["%", "_"]):
             lastname_pattern = f"{lastname_pattern}%"
 
-        self.builder.where("p.Name LIKE ?", lastname_pattern)
-
-        return self.builder.build()
+        return self._compiled_sql[("by_lastname_like", bool(include_diagnoses))], (lastname_pattern,)
 
 
 class TableInfoQueryBuilder:
@@ -1,25 +1,49 @@
 """Output formatting utilities for database query results."""
 
 import csv
+import importlib.util
 import io  # For potential string buffering
 import json
 import logging
+import operator
 import sys
 from datetime import date, datetime
-from typing import Any, Dict, List, Optional, Set, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 from ..matching.models import MatchCandidate
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
-# Optional: Use tabulate for nicer console tables
+# Fields identifying a patient when grouping multi-patient result sets; the ID and
+# birth date (when selected) keep different patients who share a name apart
+PATIENT_KEY_FIELDS = ("Name", "Vorname", "PatientID", "Geburtsdatum")
+
+# Patient-level fields shown once per patient group in txt/json output
+PATIENT_FIELDS = ("Name", "Vorname", "PatientID", "FirstName", "LastName", "Geburtsdatum", "DOB")
+
+# Diagnosis fields that vary between a patient's records in the optimized formats
+VARYING_FIELDS = ("ICD10", "Bezeichnung", "Diagnosis", "Code", "Description")
+
+# Set views of the field tuples for per-column membership tests
+PATIENT_FIELD_SET = frozenset(PATIENT_FIELDS)
+VARYING_FIELD_SET = frozenset(VARYING_FIELDS)
+
+# Separators for compact JSON output (indent=None): no padding after ',' and ':'
+COMPACT_JSON_SEPARATORS = (",", ":")
+
+# Optional: Use orjson for faster JSON serialization (compact and 2-space indented output)
 try:
-    from tabulate import tabulate
+    import orjson
 
-    HAS_TABULATE = True
+    HAS_ORJSON = True
 except ImportError:
-    HAS_TABULATE = False
+    HAS_ORJSON = False
+
+# Optional: Use tabulate for nicer console tables. It is imported on first use in
+# format_as_console_table, so file and JSON output do not pay for loading it.
+HAS_TABULATE = importlib.util.find_spec("tabulate") is not None
+if not HAS_TABULATE:
     logger.warning("'tabulate' library not found. Console table formatting will be basic.")
     logger.info("To install tabulate, run: pip install tabulate")
 
@@ -38,16 +62,96 @@ class OutputFormatter:
 
         # Add match details for each field
         for info in candidate.match_fields_info:
-            field_prefix = info.field_name
-            result[f"{field_prefix}_input_value"] = info.input_value
-            result[f"{field_prefix}_db_value"] = info.db_value
-            result[f"{field_prefix}_match_type"] = info.match_type
-            result[f"{field_prefix}_similarity"] = info.similarity_score
+            field_name = info.field_name
+            result[field_name + "_input_value"] = info.input_value
+            result[field_name + "_db_value"] = info.db_value
+            result[field_name + "_match_type"] = info.match_type
+            result[field_name + "_similarity"] = info.similarity_score
             if info.details:
-                result[f"{field_prefix}_details"] = info.details
+                result[field_name + "_details"] = info.details
 
         return result
 
+    @staticmethod
+    def _present_fields(data: List[Dict[str, Any]], fields: Tuple[str, ...]) -> Tuple[str, ...]:
+        """
+        Return the subset of ``fields`` present in any record of the result set, in ``fields`` order.
+
+        Records are scanned once, stopping as soon as every field has been seen,
+        which for uniform query results is after the first record.
+        """
+        if not data or not isinstance(data[0], dict):
+            return ()
+        missing = fields
+        for record in data:
+            missing = tuple(field for field in missing if field not in record)
+            if not missing:
+                return fields
+        return tuple(field for field in fields if field not in missing)
+
+    @staticmethod
+    def _varying_record(record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Project a record onto its varying columns for the optimized formats.
+
+        Diagnosis fields are kept even when None, other non-patient columns only
+        when they hold a value; the record's own column order is preserved.
+        """
+        return {
+            key: value
+            for key, value in record.items()
+            if key in VARYING_FIELD_SET or (key not in PATIENT_FIELD_SET and value is not None)
+        }
+
+    @staticmethod
+    def _patient_keys(data: List[Dict[str, Any]]) -> List[Tuple[Any, ...]]:
+        """
+        Extract the patient grouping key of every record in a single pass.
+
+        The key holds the PATIENT_KEY_FIELDS present in the result set, so it is
+        (Name, Vorname) plus PatientID and Geburtsdatum when those are selected.
+
+        The keys are returned as a column parallel to ``data`` so callers can
+        detect multiple patients and group records without re-hashing the
+        record dictionaries for every pass.
+        """
+        key_fields = OutputFormatter._present_fields(data, PATIENT_KEY_FIELDS)
+        if not key_fields:
+            return [()] * len(data)
+        return [tuple(record.get(field) for field in key_fields) for record in data]
+
+    @staticmethod
+    def _group_by_patient(
+        data: List[Dict[str, Any]],
+        patient_keys: List[Tuple[Any, ...]],
+    ) -> List[Tuple[Optional[Tuple[Any, ...]], List[Dict[str, Any]]]]:
+        """
+        Group records by patient key, in order of each patient's first appearance.
+
+        Used by the multi-patient json outputs: a patient's records are merged
+        even when they are not consecutive. Records without patient info join
+        the group of the record before them, or a leading group with key None.
+
+        Returns:
+            List of (patient key or None, records) pairs.
+        """
+        groups: List[Tuple[Optional[Tuple[Any, ...]], List[Dict[str, Any]]]] = []
+        records_by_key: Dict[Tuple[Any, ...], List[Dict[str, Any]]] = {}
+        current_records: Optional[List[Dict[str, Any]]] = None
+
+        for record, patient_key in zip(data, patient_keys):
+            if any(val is not None for val in patient_key):
+                current_records = records_by_key.get(patient_key)
+                if current_records is None:
+                    current_records = records_by_key[patient_key] = []
+                    groups.append((patient_key, current_records))
+            elif current_records is None:
+                current_records = []
+                groups.append((None, current_records))
+            current_records.append(record)
+
+        return groups
+
     @staticmethod
     def _datetime_serializer(obj: Any) -> str:
         """
@@ -59,6 +163,46 @@ class OutputFormatter:
         # Let the default JSON encoder handle other types or raise TypeError
         raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
+    @staticmethod
+    def _json_separators(indent: Optional[int]) -> Optional[Tuple[str, str]]:
+        """Return compact separators when no indentation is requested, else json's defaults."""
+        return COMPACT_JSON_SEPARATORS if indent is None else None
+
+    @staticmethod
+    def _dumps_json_stdlib(obj: Any, indent: Optional[int]) -> str:
+        """Serialize ``obj`` to a JSON string with the standard library encoder."""
+        return json.dumps(
+            obj,
+            default=OutputFormatter._datetime_serializer,
+            indent=indent,
+            separators=OutputFormatter._json_separators(indent),
+        )
+
+    @staticmethod
+    def _dumps_json(obj: Any, indent: Optional[int]) -> str:
+        """
+        Serialize ``obj`` to a JSON string, using orjson when it is installed.
+
+        orjson only supports compact and 2-space indented output, so other
+        indentation levels always go through the standard library encoder, as
+        do payloads orjson rejects (e.g. integers wider than 64 bits). orjson
+        cannot escape non-ASCII characters the way the json module does, so
+        payloads containing any are re-encoded with the json module to keep
+        the output identical whichever backend is installed.
+        """
+        if HAS_ORJSON and indent in (None, 2):
+            option = orjson.OPT_NON_STR_KEYS
+            if indent == 2:
+                option |= orjson.OPT_INDENT_2
+            try:
+                encoded = orjson.dumps(obj, default=OutputFormatter._datetime_serializer, option=option)
+            except orjson.JSONEncodeError as e:
+                logger.debug(f"orjson could not encode the payload ({e}); using the json module")
+            else:
+                if encoded.isascii():
+                    return encoded.decode("ascii")
+        return OutputFormatter._dumps_json_stdlib(obj, indent)
+
     @staticmethod
     def format_as_json(
         data_payload: List[Any],
@@ -77,7 +221,8 @@ class OutputFormatter:
             metadata (Dict[str, Any]): The metadata dictionary for the query.
                                      If None, no metadata will be included.
             indent (Optional[int]): The indentation level for pretty-printing JSON.
-                                  Set to None for compact output. Defaults to 4.
+                                  Set to None for compact output without whitespace
+                                  after separators. Defaults to 4.
 
         Returns:
             str: The JSON formatted string representation of the structured data.
@@ -92,56 +237,30 @@ class OutputFormatter:
 
             # Check if we have multiple patients and structure accordingly
             if isinstance(data_payload, list) and data_payload and isinstance(data_payload[0], dict):
-                # Identify patient-related fields
-                patient_fields = [
-                    "Name",
-                    "Vorname",
-                    "PatientID",
-                    "FirstName",
-                    "LastName",
-                    "Geburtsdatum",
-                    "DOB",
-                ]
+                # Identify patient-related fields present in this result set
+                patient_fields = OutputFormatter._present_fields(data_payload, PATIENT_FIELDS)
 
                 # Check for multiple patients
-                unique_patients = set()
-                for record in data_payload:
-                    patient_key = tuple(record.get(field) for field in ["Name", "Vorname"] if field in record)
-                    if any(val is not None for val in patient_key):
-                        unique_patients.add(patient_key)
+                patient_keys = OutputFormatter._patient_keys(data_payload)
+                unique_patients = {key for key in patient_keys if any(val is not None for val in key)}
 
                 if len(unique_patients) > 1:
                     # Multiple patients - group by patient
                     patients_data: List[Dict[str, Any]] = []
-                    current_patient_data: Optional[Dict[str, Any]] = None
-                    current_patient_key = None
-
-                    for record in data_payload:
-                        patient_key = tuple(record.get(field) for field in ["Name", "Vorname"] if field in record)
-
-                        # If patient changed, start new patient group
-                        if patient_key != current_patient_key and any(val is not None for val in patient_key):
-                            if current_patient_data is not None:
-                                patients_data.append(current_patient_data)
-
-                            # Extract patient info
-                            patient_info = {}
-                            for field in patient_fields:
-                                if field in record and record[field] is not None:
-                                    patient_info[field] = record[field]
-
-                            current_patient_data = {"patient_info": patient_info, "records": []}
-                            current_patient_key = patient_key
-
-                        # Add record to current patient (or create default group if no patient info)
-                        if current_patient_data is None:
-                            current_patient_data = {"records": []}
+                    for patient_key, records in OutputFormatter._group_by_patient(data_payload, patient_keys):
+                        if patient_key is None:
+                            # Records without patient info before any patient go to a default group
+                            patients_data.append({"records": records})
+                            continue
 
-                        current_patient_data["records"].append(record)
+                        # Extract patient info
+                        patient_info = {}
+                        for field in patient_fields:
+                            value = records[0].get(field)
+                            if value is not None:
+                                patient_info[field] = value
 
-                    # Add the last patient
-                    if current_patient_data is not None:
-                        patients_data.append(current_patient_data)
+                        patients_data.append({"patient_info": patient_info, "records": records})
 
                     structured_output = {"metadata": metadata or {}, "data": patients_data}
                 else:
@@ -163,27 +282,49 @@ class OutputFormatter:
                     processed_payload.append(OutputFormatter._match_candidate_to_dict(candidate))
                 structured_output["data"] = processed_payload
 
-            return json.dumps(
-                structured_output,
-                default=OutputFormatter._datetime_serializer,
-                indent=indent,
-            )
+            return OutputFormatter._dumps_json(structured_output, indent)
         except (TypeError, ValueError) as e:
             logger.error(f"Error during JSON serialization: {e}")
             # Re-raise for proper error handling by caller
             raise
 
+    @staticmethod
+    def _format_delimited(data: List[Dict[str, Any]], delimiter: str) -> str:
+        """
+        Write records as delimited text with a header row taken from the first record.
+
+        When every record has exactly the first record's columns, the values are
+        pulled with one operator.itemgetter call per record and written by a plain
+        csv.writer. Ragged records fall back to csv.DictWriter, which fills missing
+        columns with "" and rejects unknown ones.
+        """
+        output = io.StringIO()
+        fieldnames = list(data[0].keys())
+        rows: Optional[List[Tuple[Any, ...]]] = None
+        if len(fieldnames) > 1 and all(len(record) == len(fieldnames) for record in data):
+            getter = operator.itemgetter(*fieldnames)
+            try:
+                rows = [getter(record) for record in data]
+            except KeyError:
+                rows = None  # Same width, different columns
+
+        if rows is not None:
+            writer = csv.writer(output, delimiter=delimiter)
+            writer.writerow(fieldnames)
+            writer.writerows(rows)
+        else:
+            dict_writer = csv.DictWriter(output, fieldnames=fieldnames, delimiter=delimiter)
+            dict_writer.writeheader()
+            dict_writer.writerows(data)
+        return output.getvalue()
+
     @staticmethod
     def format_as_csv(data: List[Dict[str, Any]]) -> str:
         """Formats the data into a CSV string."""
         if not data:
             return ""
 
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=data[0].keys())
-        writer.writeheader()
-        writer.writerows(data)
-        return output.getvalue()
+        return OutputFormatter._format_delimited(data, ",")
 
     @staticmethod
     def format_as_tsv(data: List[Dict[str, Any]]) -> str:
@@ -191,11 +332,7 @@ class OutputFormatter:
         if not data:
             return ""
 
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=data[0].keys(), delimiter="\t")
-        writer.writeheader()
-        writer.writerows(data)
-        return output.getvalue()
+        return OutputFormatter._format_delimited(data, "\t")
 
     @staticmethod
     def format_as_txt(data: List[Dict[str, Any]]) -> str:
@@ -212,33 +349,19 @@ class OutputFormatter:
         if not data:
             return ""
 
-        # Identify patient-related fields
-        patient_fields = [
-            "Name",
-            "Vorname",
-            "PatientID",
-            "FirstName",
-            "LastName",
-            "Geburtsdatum",
-            "DOB",
-        ]
+        # Identify patient-related fields present in this result set
+        patient_fields = OutputFormatter._present_fields(data, PATIENT_FIELDS)
 
         # Check if we have multiple patients by looking for different Name/Vorname combinations
-        unique_patients = set()
-        for record in data:
-            patient_key = tuple(record.get(field) for field in ["Name", "Vorname"] if field in record)
-            if any(val is not None for val in patient_key):
-                unique_patients.add(patient_key)
+        patient_keys = OutputFormatter._patient_keys(data)
+        unique_patients = {key for key in patient_keys if any(val is not None for val in key)}
 
         # If we have multiple patients, group by patient
         if len(unique_patients) > 1:
             cell_values = []
             current_patient = None
 
-            for record in data:
-                # Get patient identifier for this record
-                patient_key = tuple(record.get(field) for field in ["Name", "Vorname"] if field in record)
-
+            for record, patient_key in zip(data, patient_keys):
                 # If patient changed, add patient info and separator
                 if patient_key != current_patient and any(val is not None for val in patient_key):
                     if current_patient is not None:
@@ -246,8 +369,9 @@ class OutputFormatter:
 
                     # Add patient information
                     for field in patient_fields:
-                        if field in record and record[field] is not None:
-                            cell_value = str(record[field]).strip()
+                        value = record.get(field)
+                        if value is not None:
+                            cell_value = str(value).strip()
                             if cell_value:
                                 cell_values.append(cell_value)
 
@@ -258,7 +382,7 @@ class OutputFormatter:
 
                 # Add non-patient data
                 for key, value in record.items():
-                    if key not in patient_fields and value is not None:
+                    if key not in PATIENT_FIELDS and value is not None:
                         if isinstance(value, (int, float, bool)):
                             value = str(value)
                         elif not isinstance(value, str):
@@ -300,34 +424,19 @@ class OutputFormatter:
         if not data:
             return ""
 
-        # Identify patient-related fields that typically remain constant
-        patient_fields = [
-            "Name",
-            "Vorname",
-            "PatientID",
-            "FirstName",
-            "LastName",
-            "Geburtsdatum",
-            "DOB",
-        ]
-        # Identify diagnosis/varying fields
-        varying_fields = ["ICD10", "Bezeichnung", "Diagnosis", "Code", "Description"]
+        patient_fields = PATIENT_FIELDS
+        varying_fields = VARYING_FIELDS
 
         # Check for multiple patients
-        unique_patients = set()
-        for record in data:
-            patient_key = tuple(record.get(field) for field in ["Name", "Vorname"] if field in record)
-            if any(val is not None for val in patient_key):
-                unique_patients.add(patient_key)
+        patient_keys = OutputFormatter._patient_keys(data)
+        unique_patients = {key for key in patient_keys if any(val is not None for val in key)}
 
         if len(unique_patients) > 1:
             # Multiple patients - create grouped structure with separators
             cell_values = []
             current_patient_key = None
 
-            for record in data:
-                patient_key = tuple(record.get(field) for field in ["Name", "Vorname"] if field in record)
-
+            for record, patient_key in zip(data, patient_keys):
                 # If patient changed, start new patient group
                 if patient_key != current_patient_key and any(val is not None for val in patient_key):
                     if current_patient_key is not None:
@@ -372,11 +481,7 @@ class OutputFormatter:
 
             # Extract varying information from all records
             for record in data:
-                varying_record = {}
-                for key, value in record.items():
-                    # Include varying fields or fields not in patient_fields
-                    if key in varying_fields or (key not in patient_fields and value is not None):
-                        varying_record[key] = value
+                varying_record = OutputFormatter._varying_record(record)
                 if varying_record:  # Only add if there's varying data
                     varying_data.append(varying_record)
 
@@ -436,69 +541,38 @@ class OutputFormatter:
         """
         if not data:
             empty_output = {"metadata": metadata or {}, "data": []}
-            return json.dumps(
-                empty_output,
-                default=OutputFormatter._datetime_serializer,
-                indent=indent,
-            )
-
-        # Identify patient-related fields that typically remain constant
-        patient_fields = [
-            "Name",
-            "Vorname",
-            "PatientID",
-            "FirstName",
-            "LastName",
-            "Geburtsdatum",
-            "DOB",
-        ]
-        # Identify diagnosis/varying fields
-        varying_fields = ["ICD10", "Bezeichnung", "Diagnosis", "Code", "Description"]
+            return OutputFormatter._dumps_json(empty_output, indent)
+
+        patient_fields = PATIENT_FIELDS
 
         # Check for multiple patients
-        unique_patients = set()
-        for record in data:
-            patient_key = tuple(record.get(field) for field in ["Name", "Vorname"] if field in record)
-            if any(val is not None for val in patient_key):
-                unique_patients.add(patient_key)
+        patient_keys = OutputFormatter._patient_keys(data)
+        unique_patients = {key for key in patient_keys if any(val is not None for val in key)}
 
         if len(unique_patients) > 1:
-            # Multiple patients - create grouped structure
+            # Multiple patients - group by patient
+            present_patient_fields = OutputFormatter._present_fields(data, patient_fields)
             patients_data: List[Dict[str, Any]] = []
-            current_patient_data: Optional[Dict[str, Any]] = None
-            current_patient_key = None
 
-            for record in data:
-                patient_key = tuple(record.get(field) for field in ["Name", "Vorname"] if field in record)
-
-                # If patient changed, start new patient group
-                if patient_key != current_patient_key and any(val is not None for val in patient_key):
-                    if current_patient_data is not None:
-                        patients_data.append(current_patient_data)
-
-                    # Extract patient info
-                    patient_info = {}
-                    for field in patient_fields:
-                        if field in record and record[field] is not None:
-                            patient_info[field] = record[field]
-
-                    current_patient_data = {"patient_info": patient_info, "diagnoses": []}
-                    current_patient_key = patient_key
-
-                # Add diagnosis data to current patient
-                if current_patient_data is None:
-                    current_patient_data = {"diagnoses": []}
-
-                varying_record = {}
-                for key, value in record.items():
-                    if key in varying_fields or (key not in patient_fields and value is not None):
-                        varying_record[key] = value
-                if varying_record:
-                    current_patient_data["diagnoses"].append(varying_record)
+            for patient_key, records in OutputFormatter._group_by_patient(data, patient_keys):
+                diagnoses = []
+                for record in records:
+                    varying_record = OutputFormatter._varying_record(record)
+                    if varying_record:
+                        diagnoses.append(varying_record)
+
+                if patient_key is None:
+                    # Records without patient info before any patient go to a default group
+                    patients_data.append({"diagnoses": diagnoses})
+                    continue
+
+                patient_info = {}
+                for field in present_patient_fields:
+                    value = records[0].get(field)
+                    if value is not None:
+                        patient_info[field] = value
 
-            # Add the last patient
-            if current_patient_data is not None:
-                patients_data.append(current_patient_data)
+                patients_data.append({"patient_info": patient_info, "diagnoses": diagnoses})
 
             optimized_data: Union[List[Dict[str, Any]], Dict[str, Any]] = patients_data
         else:
@@ -515,11 +589,7 @@ class OutputFormatter:
 
             # Extract varying information from all records
             for record in data:
-                varying_record = {}
-                for key, value in record.items():
-                    # Include varying fields or fields not in patient_fields
-                    if key in varying_fields or (key not in patient_fields and value is not None):
-                        varying_record[key] = value
+                varying_record = OutputFormatter._varying_record(record)
                 if varying_record:  # Only add if there's varying data
                     varying_data.append(varying_record)
 
@@ -528,11 +598,7 @@ class OutputFormatter:
 
         structured_output: Dict[str, Any] = {"metadata": metadata or {}, "data": optimized_data}
 
-        return json.dumps(
-            structured_output,
-            default=OutputFormatter._datetime_serializer,
-            indent=indent,
-        )
+        return OutputFormatter._dumps_json(structured_output, indent)
 
     @staticmethod
     def format_as_csv_optimized(data: List[Dict[str, Any]]) -> str:
@@ -549,18 +615,7 @@ class OutputFormatter:
         if not data:
             return ""
 
-        # Identify patient-related fields that typically remain constant
-        patient_fields = [
-            "Name",
-            "Vorname",
-            "PatientID",
-            "FirstName",
-            "LastName",
-            "Geburtsdatum",
-            "DOB",
-        ]
-        # Identify diagnosis/varying fields
-        varying_fields = ["ICD10", "Bezeichnung", "Diagnosis", "Code", "Description"]
+        patient_fields = PATIENT_FIELDS
 
         # Separate patient info and varying info
         patient_info = {}
@@ -575,11 +630,7 @@ class OutputFormatter:
 
         # Extract varying information from all records
         for record in data:
-            varying_record = {}
-            for key, value in record.items():
-                # Include varying fields or fields not in patient_fields
-                if key in varying_fields or (key not in patient_fields and value is not None):
-                    varying_record[key] = value
+            varying_record = OutputFormatter._varying_record(record)
             if varying_record:  # Only add if there's varying data
                 varying_data.append(varying_record)
 
@@ -621,25 +672,25 @@ class OutputFormatter:
         # Check if data contains MatchCandidate objects
         if isinstance(data[0], MatchCandidate):
             headers = ["Name", "DOB", "Score", "Match Type"]
+            candidate_fields = operator.attrgetter("db_record", "overall_score", "primary_match_type")
             rows = [
-                [
-                    candidate.db_record.get("Name"),
-                    candidate.db_record.get("Geburtsdatum"),
-                    candidate.overall_score,
-                    candidate.primary_match_type,
-                ]
-                for candidate in data
+                [record.get("Name"), record.get("Geburtsdatum"), score, match_type]
+                for record, score, match_type in map(candidate_fields, data)
             ]
         else:
             headers = list(data[0].keys())
-            rows = [list(row.values()) for row in data]
+            # Look each header up so records with other columns stay aligned under the headers
+            rows = [[row.get(h, "") for h in headers] for row in data]
 
         if HAS_TABULATE:
+            from tabulate import tabulate
+
             table = tabulate(rows, headers=headers, tablefmt="grid")
             print(table, file=stream)
         else:
             # Fallback to basic formatting
             logger.debug("Using basic table formatting (tabulate not available)")
-            print("\t".join(headers), file=stream)
-            for row in data:
-                print("\t".join(str(row.get(h, "")) for h in headers), file=stream)
+            # Collect all lines from the rows built above and write them to the stream at once
+            lines = ["\t".join(headers)]
+            lines.extend("\t".join(str(value) for value in row) for row in rows)
+            stream.write("\n".join(lines) + "\n")
@@ -1,13 +1,26 @@
 """Query management utilities for SQL template loading and execution."""
 
+import logging
 import os
+import stat
+import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 from ..secure_logging import get_secure_logger
 from .db_interface import SQLInterface
 from .exceptions import QueryTemplateNotFoundError
 
+# Template file names used by the prebuilt query helpers. Passing the full file name
+# lets load_query_template hit _template_cache without building a new key string.
+LIST_TABLES_TEMPLATE = "list_tables.sql"
+PATIENT_BY_ID_TEMPLATE = "get_patient_by_id.sql"
+PATIENT_BY_NAME_DOB_TEMPLATE = "get_patient_by_name_dob.sql"
+PATIENTS_BY_DOB_YEAR_RANGE_TEMPLATE = "get_patients_by_dob_year_range.sql"
+PATIENTS_BY_LASTNAME_LIKE_TEMPLATE = "get_patients_by_lastname_like.sql"
+ALL_PATIENTS_TEMPLATE = "get_all_patients.sql"
+TABLE_COLUMNS_TEMPLATE = "get_table_columns.sql"
+
 
 class QueryManager:
     """Manages SQL queries, including template loading and parameter substitution."""
@@ -29,14 +42,20 @@ class QueryManager:
         # Convert to string if it's a Path or similar object
         templates_dir_str = str(templates_dir)
 
-        # Strict validation
-        if not os.path.exists(templates_dir_str):
+        # Strict validation, from a single stat call
+        try:
+            templates_dir_stat = os.stat(templates_dir_str)
+        except (OSError, ValueError):
             raise ValueError(f"templates_dir path does not exist: {templates_dir_str}")
-        if not os.path.isdir(templates_dir_str):
+        if not stat.S_ISDIR(templates_dir_stat.st_mode):
             raise ValueError(f"templates_dir is not a directory: {templates_dir_str}")
 
         self.templates_dir = templates_dir_str
         self.debug = debug
+        # Template text by file name; templates are read from disk once per QueryManager
+        self._template_cache: Dict[str, str] = {}
+        # Template file names found missing, so repeated probes skip the filesystem
+        self._missing_templates: Set[str] = set()
         self.logger = get_secure_logger(__name__, production_mode=not debug)
 
         if self.debug:
@@ -52,7 +71,7 @@ class QueryManager:
             template_name (str): Name of template file without .sql extension
 
         Returns:
-            str: The SQL query template string
+            str: The SQL query template string (interned, cached until reload_templates)
 
         Raises:
             QueryTemplateNotFoundError: If template file doesn't exist
@@ -60,8 +79,13 @@ class QueryManager:
         if not template_name.endswith(".sql"):
             template_name += ".sql"
 
+        cached = self._template_cache.get(template_name)
+        if cached is not None:
+            return cached
+
         template_path = os.path.join(self.templates_dir, template_name)
-        if not os.path.isfile(template_path):
+        if template_name in self._missing_templates or not os.path.isfile(template_path):
+            self._missing_templates.add(template_name)
             raise QueryTemplateNotFoundError(f"SQL template file not found: {template_path}")
 
         try:
@@ -70,12 +94,20 @@ class QueryManager:
 
             if self.debug:
                 self.logger.debug(f"Template '{template_name}' loaded successfully")
+            # Interned so every load of a template yields the same string object, letting
+            # the driver reuse its prepared statement when the query is executed again
+            template = self._template_cache[template_name] = sys.intern(template)
             return template
         except OSError as e:
             raise QueryTemplateNotFoundError(
                 f"Error reading SQL template file '{template_path}': {e}",
             )
 
+    def reload_templates(self) -> None:
+        """Drop cached templates and missing names so the next load_query_template call re-reads them from disk."""
+        self._template_cache.clear()
+        self._missing_templates.clear()
+
     def execute_template_query(
         self,
         db: SQLInterface,
@@ -95,9 +127,11 @@ class QueryManager:
                                           or None if query fails
         """
         try:
-            self.logger.debug(f"Executing template '{template_name}'")
-            if params and self.debug:
-                self.logger.debug(f"Template parameters provided: {len(params)} parameters")
+            # Skip building debug messages unless they will be emitted
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Executing template '{template_name}'")
+                if params and self.debug:
+                    self.logger.debug(f"Template parameters provided: {len(params)} parameters")
 
             query = self.load_query_template(template_name)
             param_values = tuple(params.values()) if params else ()
@@ -119,11 +153,11 @@ class QueryManager:
 
     def get_list_tables_query(self) -> Tuple[str, tuple]:
         """Get a query to list available tables."""
-        return self.load_query_template("list_tables"), ()
+        return self.load_query_template(LIST_TABLES_TEMPLATE), ()
 
     def get_patient_by_id_query(self, patient_id: int, include_diagnoses: bool = True) -> Tuple[str, tuple]:
         """Get a query to find a patient by ID."""
-        return self.load_query_template("get_patient_by_id"), (patient_id,)
+        return self.load_query_template(PATIENT_BY_ID_TEMPLATE), (patient_id,)
 
     def get_patient_by_name_dob_query(
         self,
@@ -134,7 +168,7 @@ class QueryManager:
     ) -> Tuple[str, tuple]:
         """Get a query to find a patient by name and date of birth."""
         return (
-            self.load_query_template("get_patient_by_name_dob"),
+            self.load_query_template(PATIENT_BY_NAME_DOB_TEMPLATE),
             (first_name, last_name, dob_date),
         )
 
@@ -153,7 +187,7 @@ class QueryManager:
         Returns:
             Tuple[str, Tuple[int, int]]: SQL query and params tuple
         """
-        sql = self.load_query_template("get_patients_by_dob_year_range")
+        sql = self.load_query_template(PATIENTS_BY_DOB_YEAR_RANGE_TEMPLATE)
         return sql, (start_year, end_year)
 
     def get_patients_by_lastname_like_query(
@@ -169,9 +203,9 @@ class QueryManager:
         Returns:
             Tuple[str, Tuple[str]]: SQL query and params tuple
         """
-        if not any(c in lastname_pattern for c in ["%", "_"]):
+        if "%" not in lastname_pattern and "_" not in lastname_pattern:
             lastname_pattern = f"{lastname_pattern}%"
-        sql = self.load_query_template("get_patients_by_lastname_like")
+        sql = self.load_query_template(PATIENTS_BY_LASTNAME_LIKE_TEMPLATE)
         return sql, (lastname_pattern,)
 
     def get_all_patients_query(self, include_diagnoses: bool = True) -> Tuple[str, Tuple[()]]:
@@ -180,7 +214,7 @@ class QueryManager:
         Returns:
             Tuple[str, Tuple[()]]: SQL query and empty params tuple
         """
-        sql = self.load_query_template("get_all_patients")
+        sql = self.load_query_template(ALL_PATIENTS_TEMPLATE)
         return sql, ()
 
     def get_table_columns_query(
@@ -189,5 +223,5 @@ class QueryManager:
         table_schema: str,
     ) -> Tuple[str, Tuple[str, str]]:
         """Get a query to fetch column names and data types for a specific table."""
-        sql = self.load_query_template("get_table_columns")
+        sql = self.load_query_template(TABLE_COLUMNS_TEMPLATE)
         return sql, (table_name, table_schema)
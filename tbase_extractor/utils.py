@@ -12,17 +12,28 @@ except ImportError:
         from importlib import resources
 
         files = getattr(resources, "files", None)
+import functools
+import inspect
 import logging
 import os
 import sys
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional
 
+# Input CSVs are read sequentially; a larger buffer means fewer read() calls on big files
+_CSV_READ_BUFFER_SIZE = 1 << 20
 
+
+@functools.lru_cache(maxsize=1)
 def resolve_templates_dir() -> str:
     """
     Resolves the path to the SQL templates directory robustly.
     Handles both development and installed package scenarios.
 
+    The location of the templates cannot change during a process, so the
+    resolved path is cached after the first successful lookup. Failures are
+    not cached. Call ``resolve_templates_dir.cache_clear()`` to force a new
+    lookup.
+
     Returns:
         str: Absolute path to the sql_templates directory
 
@@ -87,6 +98,105 @@ def resolve_templates_dir() -> str:
     raise RuntimeError(error_msg)
 
 
+@functools.lru_cache(maxsize=None)
+def _parameter_names(func: Callable[..., Any]) -> FrozenSet[str]:
+    """
+    Return the names of the declared parameters of a function (cached per function).
+
+    Uses ``inspect.signature`` so decorated functions report the parameters of the
+    function they wrap; ``*args``/``**kwargs`` catch-alls are not counted.
+    """
+    return frozenset(
+        name
+        for name, parameter in inspect.signature(func).parameters.items()
+        if parameter.kind not in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+    )
+
+
+def accepts_parameter(method: Optional[Callable[..., Any]], param_name: str) -> bool:
+    """
+    Checks whether a function or bound method declares a parameter with the given name.
+
+    Used to detect optional keyword support (e.g. ``include_diagnoses``) across the
+    different query manager implementations. The introspection result is cached per
+    underlying function, so repeated checks inside batch loops are cheap.
+
+    Args:
+        method (Optional[Callable[..., Any]]): The function or bound method to inspect;
+            None (e.g. from ``getattr(obj, name, None)``) is reported as not accepting
+        param_name (str): Name of the parameter to look for
+
+    Returns:
+        bool: True if the parameter is declared, False otherwise (including for
+              callables without a ``__code__`` object, such as mocks or builtins)
+    """
+    func = getattr(method, "__func__", method)
+    if getattr(func, "__code__", None) is None:
+        return False
+    return param_name in _parameter_names(func)
+
+
+def read_ids_iter(csv_file_path: str, id_column_name: str, logger: logging.Logger) -> Iterator[str]:
+    """
+    Lazily yields IDs from a specified column in a CSV file.
+
+    Rows are parsed one at a time as the iterator is consumed, so memory use does
+    not grow with the file. A missing file, empty file or missing ID column is
+    logged and yields nothing; empty ID values are logged and skipped.
+
+    Args:
+        csv_file_path (str): Path to the CSV file containing IDs
+        id_column_name (str): Name of the column containing the IDs
+        logger (logging.Logger): Logger for error reporting
+
+    Yields:
+        str: Stripped, non-empty IDs in file order
+
+    Raises:
+        csv.Error: If the file cannot be parsed as CSV
+        OSError: If the file cannot be read
+    """
+    if not os.path.exists(csv_file_path):
+        logger.error(f"CSV file not found: {csv_file_path}")
+        return
+
+    with open(
+        csv_file_path,
+        encoding="utf-8-sig",
+        newline="",
+        buffering=_CSV_READ_BUFFER_SIZE,
+    ) as infile:  # utf-8-sig for BOM
+        reader = csv.reader(infile)
+        header = next(reader, None)
+        if not header:
+            logger.error(
+                f"CSV file '{csv_file_path}' appears to be empty or improperly formatted.",
+            )
+            return
+
+        if id_column_name not in header:
+            logger.error(
+                f"ID column '{id_column_name}' not found in CSV header. Available columns: {header}",
+            )
+            return
+
+        # Positional lookup instead of a dict per row; like csv.DictReader, the last
+        # duplicate header wins, blank lines are skipped and short rows lack the value
+        id_index = len(header) - 1 - header[::-1].index(id_column_name)
+        row_num = 0
+        for row in reader:
+            if not row:
+                continue
+            row_num += 1
+            patient_id_str = row[id_index].strip() if id_index < len(row) else ""
+            if patient_id_str:
+                yield patient_id_str
+            else:
+                logger.warning(
+                    f"Missing or empty ID in CSV file '{csv_file_path}' at row {row_num}.",
+                )
+
+
 def read_ids_from_csv(csv_file_path: str, id_column_name: str, logger: logging.Logger) -> List[str]:
     """
     Reads a list of IDs from a specified column in a CSV file.
@@ -109,38 +219,8 @@ def read_ids_from_csv(csv_file_path: str, id_column_name: str, logger: logging.L
     Returns:
         List[str]: List of IDs extracted from the CSV file
     """
-    ids: List[str] = []
-    if not os.path.exists(csv_file_path):
-        logger.error(f"CSV file not found: {csv_file_path}")
-        return ids
-
     try:
-        with open(
-            csv_file_path,
-            encoding="utf-8-sig",
-            newline="",
-        ) as infile:  # utf-8-sig for BOM
-            reader = csv.DictReader(infile)
-            if not reader.fieldnames:
-                logger.error(
-                    f"CSV file '{csv_file_path}' appears to be empty or improperly formatted.",
-                )
-                return ids
-
-            if id_column_name not in reader.fieldnames:
-                logger.error(
-                    f"ID column '{id_column_name}' not found in CSV header. Available columns: {reader.fieldnames}",
-                )
-                return ids
-
-            for row_num, row in enumerate(reader, 1):
-                patient_id_str = row.get(id_column_name)
-                if patient_id_str and patient_id_str.strip():
-                    ids.append(patient_id_str.strip())
-                else:
-                    logger.warning(
-                        f"Missing or empty ID in CSV file '{csv_file_path}' at row {row_num}.",
-                    )
+        ids = list(read_ids_iter(csv_file_path, id_column_name, logger))
     except csv.Error as e:
         logger.error(f"Error reading CSV file '{csv_file_path}': {e}")
         return []  # Return empty list on CSV error
@@ -186,31 +266,51 @@ def read_patient_data_from_csv(
         return patients_data
 
     try:
-        with open(csv_file_path, encoding="utf-8-sig", newline="") as f:
-            reader = csv.DictReader(f)
+        with open(csv_file_path, encoding="utf-8-sig", newline="", buffering=_CSV_READ_BUFFER_SIZE) as f:
+            reader = csv.reader(f)
 
             # Validate required columns exist
-            headers = reader.fieldnames
+            headers = next(reader, None)
             if not headers:
                 if logger:
                     logger.error("CSV file appears to be empty")
                 return patients_data
 
+            # The last duplicate header wins, as with csv.DictReader
+            header_index = {name: i for i, name in enumerate(headers)}
+            width = len(headers)
+            restval: List[Any] = [None]
+
             required_columns = {fn_column, ln_column, dob_column}
-            missing_columns = required_columns - set(headers)
+            missing_columns = required_columns - header_index.keys()
             if missing_columns:
                 if logger:
                     logger.error(f"Missing required columns in CSV: {', '.join(missing_columns)}")
                 return patients_data
 
-            for row_num, row in enumerate(reader, start=1):
+            fn_index = header_index[fn_column]
+            ln_index = header_index[ln_column]
+            dob_index = header_index[dob_column]
+            row_num = 0
+            for row in reader:
+                # Blank lines are skipped, as with csv.DictReader
+                if not row:
+                    continue
+                row_num += 1
+                if len(row) < width:
+                    # Missing trailing fields are None, as with csv.DictReader's restval
+                    row.extend(restval * (width - len(row)))
+                raw_data: Dict[Optional[str], Any] = dict(zip(headers, row))
+                if len(row) > width:
+                    # Surplus fields are kept under None, as with csv.DictReader's restkey
+                    raw_data[None] = row[width:]
                 # Extract relevant fields and clean data
                 patient_data = {
-                    "first_name": row[fn_column].strip(),
-                    "last_name": row[ln_column].strip(),
-                    "date_of_birth": row[dob_column].strip(),
+                    "first_name": row[fn_index].strip(),
+                    "last_name": row[ln_index].strip(),
+                    "date_of_birth": row[dob_index].strip(),
                     "_row_number": row_num,  # Store row number for traceability
-                    "_raw_data": dict(row),  # Store complete row data
+                    "_raw_data": raw_data,  # Store complete row data
                 }
                 patients_data.append(patient_data)
 
@@ -0,0 +1 @@
+"""tbase-extractor test suite."""
@@ -0,0 +1,43 @@
+"""Domain-specific assertion helpers for tbase-extractor tests.
+
+Registered for pytest assertion rewriting in ``conftest.py``; ``__tracebackhide__``
+keeps the helper frame out of failure tracebacks.
+"""
+
+from typing import Dict
+from unittest.mock import Mock
+
+from tbase_extractor.matching.models import MatchInfo
+
+MATCH_TYPES = ("Exact", "Fuzzy", "Mismatch", "NotCompared", "MissingDBValue", "YearMismatch")
+SQL_STATEMENT_PREFIXES = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+
+def assert_valid_patient_data(data: Dict) -> None:
+    """Assert that data contains valid patient fields."""
+    __tracebackhide__ = True
+    for field in ("PatientID", "Name", "Vorname"):
+        assert data.get(field) is not None, f"Missing or None required field: {field}"
+
+
+def assert_valid_match_info(match_info: MatchInfo) -> None:
+    """Assert that MatchInfo object is properly constructed."""
+    __tracebackhide__ = True
+    assert match_info.field_name is not None
+    assert match_info.match_type in MATCH_TYPES
+    if match_info.similarity_score is not None:
+        assert 0.0 <= match_info.similarity_score <= 1.0
+
+
+def assert_sql_query_format(query: str) -> None:
+    """Assert that SQL query is properly formatted."""
+    __tracebackhide__ = True
+    assert isinstance(query, str)
+    assert query.strip().upper().startswith(SQL_STATEMENT_PREFIXES)
+
+
+def assert_logged_once(log_method: Mock, substring: str) -> None:
+    """Assert that a mocked logger method was called exactly once with a message containing substring."""
+    __tracebackhide__ = True
+    log_method.assert_called_once()
+    assert substring in log_method.call_args[0][0]
@@ -1,10 +1,12 @@
 """Shared pytest configuration and fixtures for tbase-extractor tests."""
 
 import csv
+import logging
 import tempfile
 from datetime import date, datetime
 from pathlib import Path
-from typing import Dict
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 from unittest.mock import MagicMock, Mock
 
 import pytest
@@ -12,81 +14,143 @@ import pytest
 from tbase_extractor.matching import FuzzyMatcher
 from tbase_extractor.matching.models import MatchCandidate, MatchInfo
 from tbase_extractor.sql_interface import SQLInterface
-from tbase_extractor.sql_interface.query_manager import QueryManager
 
-
-@pytest.fixture
-def temp_dir():
-    """Create a temporary directory for test files."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        yield Path(tmp_dir)
-
-
-@pytest.fixture
-def sample_patient_data():
-    """Sample patient data for testing."""
-    return [
+# Rewrite asserts in the shared helper module so failures show the compared values
+pytest.register_assert_rewrite("tests._asserts")
+
+# Dates shared by the sample data below, constructed once at import
+_D_1980_05_15 = date(1980, 5, 15)
+_D_1975_12_03 = date(1975, 12, 3)
+_D_1990_08_20 = date(1990, 8, 20)
+_D_1980_01_01 = date(1980, 1, 1)
+_D_2023_01_15 = date(2023, 1, 15)
+_D_2023_02_20 = date(2023, 2, 20)
+_D_2023_03_10 = date(2023, 3, 10)
+_DT_1980_05_15 = datetime(1980, 5, 15)
+
+# Read-only sample rows shared by the data fixtures; copy with dict(row) before modifying
+_PATIENT_DATA = tuple(
+    MappingProxyType(row)
+    for row in [
         {
             "PatientID": 1001,
             "Name": "Müller",
             "Vorname": "Hans",
-            "Geburtsdatum": date(1980, 5, 15),
+            "Geburtsdatum": _D_1980_05_15,
             "Address": "Hauptstraße 123",
         },
         {
             "PatientID": 1002,
             "Name": "Schmidt",
             "Vorname": "Anna",
-            "Geburtsdatum": date(1975, 12, 3),
+            "Geburtsdatum": _D_1975_12_03,
             "Address": "Nebenstraße 45",
         },
         {
             "PatientID": 1003,
             "Name": "Johnson",
             "Vorname": "John",
-            "Geburtsdatum": date(1990, 8, 20),
+            "Geburtsdatum": _D_1990_08_20,
             "Address": "Oak Street 789",
         },
     ]
+)
 
-
-@pytest.fixture
-def sample_diagnosis_data():
-    """Sample diagnosis data for testing."""
-    return [
+_DIAGNOSIS_DATA = tuple(
+    MappingProxyType(row)
+    for row in [
         {
             "PatientID": 1001,
             "ICD10": "E11.9",
             "Bezeichnung": "Diabetes mellitus, Type 2",
-            "Date": date(2023, 1, 15),
+            "Date": _D_2023_01_15,
         },
         {
             "PatientID": 1001,
             "ICD10": "I10",
             "Bezeichnung": "Essential hypertension",
-            "Date": date(2023, 2, 20),
+            "Date": _D_2023_02_20,
         },
         {
             "PatientID": 1002,
             "ICD10": "M79.1",
             "Bezeichnung": "Myalgia",
-            "Date": date(2023, 3, 10),
+            "Date": _D_2023_03_10,
         },
     ]
+)
+
+
+# Source rows per query type; fixtures hand out only the read-only _DB_RESULTS view
+_DB_ROWS: Dict[str, List[Dict[str, Any]]] = {
+    "patient_by_id": [
+        {
+            "PatientID": 1001,
+            "Name": "Müller",
+            "Vorname": "Hans",
+            "Geburtsdatum": _DT_1980_05_15,
+        },
+    ],
+    "patient_with_diagnoses": [
+        {
+            "PatientID": 1001,
+            "Name": "Müller",
+            "Vorname": "Hans",
+            "Geburtsdatum": _DT_1980_05_15,
+            "ICD10": "E11.9",
+            "Bezeichnung": "Diabetes mellitus, Type 2",
+        },
+    ],
+    "list_tables": [
+        {"Table Name": "Patient", "Column Count": 5, "Columns": "PatientID (int)\nName (varchar)"},
+        {"Table Name": "Diagnose", "Column Count": 3, "Columns": "PatientID (int)\nICD10 (varchar)"},
+    ],
+    "table_columns": [
+        {"COLUMN_NAME": "PatientID", "DATA_TYPE": "int"},
+        {"COLUMN_NAME": "Name", "DATA_TYPE": "varchar"},
+        {"COLUMN_NAME": "Vorname", "DATA_TYPE": "varchar"},
+    ],
+    "empty_result": [],
+}
+
+_DB_RESULTS: Mapping[str, Tuple[Mapping[str, Any], ...]] = MappingProxyType(
+    {query_type: tuple(MappingProxyType(row) for row in rows) for query_type, rows in _DB_ROWS.items()},
+)
 
 
 @pytest.fixture
-def sample_csv_data(temp_dir):
-    """Create sample CSV files for testing."""
+def temp_dir():
+    """Create a temporary directory for test files."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        yield Path(tmp_dir)
+
+
+@pytest.fixture(scope="session")
+def sample_patient_data():
+    """Sample patient data for testing (read-only rows)."""
+    return _PATIENT_DATA
+
+
+@pytest.fixture(scope="session")
+def sample_diagnosis_data():
+    """Sample diagnosis data for testing (read-only rows)."""
+    return _DIAGNOSIS_DATA
+
+
+@pytest.fixture(scope="session")
+def sample_csv_data(tmp_path_factory):
+    """Create sample CSV files once per test session (read-only; copy before modifying)."""
+    csv_dir = tmp_path_factory.mktemp("csv")
+
     # Patient IDs CSV
-    patient_ids_csv = temp_dir / "patient_ids.csv"
+    patient_ids_csv = csv_dir / "patient_ids.csv"
     with open(patient_ids_csv, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["PatientID"])
         writer.writerows([["1001"], ["1002"], ["1003"], ["invalid"], [""]])
 
     # Demographics CSV
-    demographics_csv = temp_dir / "demographics.csv"
+    demographics_csv = csv_dir / "demographics.csv"
     with open(demographics_csv, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["FirstName", "LastName", "DOB"])
@@ -107,9 +171,59 @@ def sample_csv_data(temp_dir):
     }
 
 
-@pytest.fixture
+class StubSQLInterface:
+    """Call-free stand-in for SQLInterface: connected, every query succeeds with no rows."""
+
+    connection = object()
+    cursor = object()
+
+    def connect(self) -> bool:
+        return True
+
+    def execute_query(self, query: str, params: Tuple = ()) -> bool:
+        return True
+
+    def fetch_results(self) -> Optional[List[Dict[str, Any]]]:
+        return []
+
+    def commit(self) -> bool:
+        return True
+
+    def close_connection(self) -> None:
+        return None
+
+
+class StubQueryManager:
+    """Call-free stand-in for QueryManager returning fixed SQL for the common queries."""
+
+    def load_query_template(self, template_name: str) -> str:
+        return "SELECT * FROM test"
+
+    def get_list_tables_query(self) -> Tuple[str, tuple]:
+        return "SELECT * FROM tables", ()
+
+    def get_patient_by_id_query(self, patient_id: int, include_diagnoses: bool = True) -> Tuple[str, tuple]:
+        return "SELECT * FROM patients WHERE id = ?", (1,)
+
+    def get_patient_by_name_dob_query(
+        self,
+        first_name: str,
+        last_name: str,
+        dob_date: Any,
+        include_diagnoses: bool = True,
+    ) -> Tuple[str, tuple]:
+        return "SELECT * FROM patients WHERE name = ? AND dob = ?", ("Test", _D_1980_01_01)
+
+
+@pytest.fixture(scope="session")
 def mock_sql_interface():
-    """Mock SQLInterface for testing without database connection."""
+    """Stateless SQLInterface stub for testing without database connection."""
+    return StubSQLInterface()
+
+
+@pytest.fixture
+def mock_sql_interface_recording():
+    """Mock SQLInterface that records calls, for tests asserting on interactions."""
     mock = Mock(spec=SQLInterface)
     mock.connect.return_value = True
     mock.connection = MagicMock()
@@ -121,90 +235,77 @@ def mock_sql_interface():
     return mock
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_query_manager():
-    """Mock QueryManager for testing without SQL templates."""
-    mock = Mock(spec=QueryManager)
-    mock.load_query_template.return_value = "SELECT * FROM test"
-    mock.get_list_tables_query.return_value = ("SELECT * FROM tables", ())
-    mock.get_patient_by_id_query.return_value = ("SELECT * FROM patients WHERE id = ?", (1,))
-    mock.get_patient_by_name_dob_query.return_value = (
-        "SELECT * FROM patients WHERE name = ? AND dob = ?",
-        ("Test", date(1980, 1, 1)),
-    )
-    return mock
+    """Stateless QueryManager stub for testing without SQL templates."""
+    return StubQueryManager()
 
 
 @pytest.fixture
 def fuzzy_matcher():
-    """Create a FuzzyMatcher instance for testing."""
+    """Create a FuzzyMatcher instance per test, so its name and score caches start empty."""
     return FuzzyMatcher(string_similarity_threshold=0.85, date_year_tolerance=1)
 
 
 @pytest.fixture
+def high_threshold_matcher():
+    """FuzzyMatcher with a strict string similarity threshold."""
+    return FuzzyMatcher(string_similarity_threshold=0.95)
+
+
+@pytest.fixture
+def low_threshold_matcher():
+    """FuzzyMatcher with a lenient string similarity threshold."""
+    return FuzzyMatcher(string_similarity_threshold=0.3)
+
+
+@pytest.fixture
+def strict_date_matcher():
+    """FuzzyMatcher that allows no year difference for dates."""
+    return FuzzyMatcher(date_year_tolerance=0)
+
+
+@pytest.fixture
+def lenient_date_matcher():
+    """FuzzyMatcher that tolerates up to three years of date difference."""
+    return FuzzyMatcher(date_year_tolerance=3)
+
+
+@pytest.fixture(scope="session")
 def sample_match_info():
-    """Sample MatchInfo objects for testing."""
-    return [
+    """Sample MatchInfo objects for testing (shared, so returned as an immutable tuple)."""
+    return (
         MatchInfo("FirstName", "Hans", "Hans", "Exact", 1.0),
         MatchInfo("LastName", "Müller", "Mueller", "Fuzzy", 0.9),
-        MatchInfo("DOB", date(1980, 5, 15), date(1980, 5, 15), "Exact", 1.0),
-    ]
+        MatchInfo("DOB", _D_1980_05_15, _D_1980_05_15, "Exact", 1.0),
+    )
 
 
 @pytest.fixture
 def sample_match_candidate(sample_patient_data, sample_match_info):
     """Sample MatchCandidate for testing."""
     candidate = MatchCandidate(
-        db_record=sample_patient_data[0],
-        match_fields_info=sample_match_info,
+        db_record=dict(sample_patient_data[0]),
+        match_fields_info=list(sample_match_info),
     )
     return candidate
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_db_results():
-    """Mock database results for different query types."""
-    return {
-        "patient_by_id": [
-            {
-                "PatientID": 1001,
-                "Name": "Müller",
-                "Vorname": "Hans",
-                "Geburtsdatum": datetime(1980, 5, 15),
-            },
-        ],
-        "patient_with_diagnoses": [
-            {
-                "PatientID": 1001,
-                "Name": "Müller",
-                "Vorname": "Hans",
-                "Geburtsdatum": datetime(1980, 5, 15),
-                "ICD10": "E11.9",
-                "Bezeichnung": "Diabetes mellitus, Type 2",
-            },
-        ],
-        "list_tables": [
-            {"Table Name": "Patient", "Column Count": 5, "Columns": "PatientID (int)\nName (varchar)"},
-            {"Table Name": "Diagnose", "Column Count": 3, "Columns": "PatientID (int)\nICD10 (varchar)"},
-        ],
-        "table_columns": [
-            {"COLUMN_NAME": "PatientID", "DATA_TYPE": "int"},
-            {"COLUMN_NAME": "Name", "DATA_TYPE": "varchar"},
-            {"COLUMN_NAME": "Vorname", "DATA_TYPE": "varchar"},
-        ],
-        "empty_result": [],
-    }
+    """Mock database results for different query types (read-only rows)."""
+    return _DB_RESULTS
 
 
 @pytest.fixture
 def mock_logger():
-    """Mock logger for testing."""
-    return Mock()
+    """Mock logger for testing, restricted to the logging.Logger interface."""
+    return Mock(spec=logging.Logger)
 
 
-@pytest.fixture(autouse=True)
-def setup_test_environment(monkeypatch):
-    """Set up test environment variables and cleanup."""
+@pytest.fixture(autouse=True, scope="session")
+def setup_test_environment():
+    """Set up test environment variables once for the whole session."""
     # Mock environment variables to avoid requiring .env file
     test_env = {
         "SQL_SERVER": "test_server",
@@ -214,12 +315,23 @@ def setup_test_environment(monkeypatch):
         "SQL_DRIVER": "{SQL Server Native Client 10.0}",
     }
 
-    for key, value in test_env.items():
-        monkeypatch.setenv(key, value)
+    # Tests that change these use the function-scoped monkeypatch, which restores
+    # the session values afterwards
+    with pytest.MonkeyPatch.context() as session_monkeypatch:
+        for key, value in test_env.items():
+            session_monkeypatch.setenv(key, value)
+
+        yield
 
-    yield
 
-    # Cleanup is automatic with monkeypatch
+def pytest_addoption(parser):
+    """Add command-line options for the test suite."""
+    parser.addoption(
+        "--fast",
+        action="store_true",
+        default=False,
+        help="Tight dev loop: skip tests marked slow and do not write .pytest_cache.",
+    )
 
 
 # Test markers for different test categories
@@ -231,36 +343,19 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "database: mark test as requiring database")
     config.addinivalue_line("markers", "performance: mark test as a performance test")
 
-
-# Custom assertions for testing
-class CustomAssertions:
-    """Custom assertion helpers for domain-specific testing."""
-
-    @staticmethod
-    def assert_valid_patient_data(data: Dict) -> None:
-        """Assert that data contains valid patient fields."""
-        required_fields = ["PatientID", "Name", "Vorname"]
-        for field in required_fields:
-            assert field in data, f"Missing required field: {field}"
-            assert data[field] is not None, f"Field {field} should not be None"
-
-    @staticmethod
-    def assert_valid_match_info(match_info: MatchInfo) -> None:
-        """Assert that MatchInfo object is properly constructed."""
-        assert match_info.field_name is not None
-        assert match_info.match_type in ["Exact", "Fuzzy", "Mismatch", "NotCompared", "MissingDBValue", "YearMismatch"]
-        if match_info.similarity_score is not None:
-            assert 0.0 <= match_info.similarity_score <= 1.0
-
-    @staticmethod
-    def assert_sql_query_format(query: str) -> None:
-        """Assert that SQL query is properly formatted."""
-        assert isinstance(query, str)
-        assert len(query.strip()) > 0
-        assert query.strip().upper().startswith(("SELECT", "INSERT", "UPDATE", "DELETE"))
-
-
-@pytest.fixture
-def custom_assertions():
-    """Provide custom assertion helpers."""
-    return CustomAssertions()
+    if config.getoption("--fast"):
+        # The last-failed/new-first plugins are what write .pytest_cache at session end
+        for name in ("lfplugin", "nfplugin", "stepwiseplugin"):
+            plugin = config.pluginmanager.get_plugin(name)
+            if plugin is not None:
+                config.pluginmanager.unregister(plugin)
+
+
+def pytest_collection_modifyitems(config, items):
+    """Deselect slow tests when running with --fast."""
+    if not config.getoption("--fast"):
+        return
+    selected = [item for item in items if item.get_closest_marker("slow") is None]
+    if len(selected) != len(items):
+        config.hook.pytest_deselected(items=[item for item in items if item.get_closest_marker("slow") is not None])
+        items[:] = selected
@@ -0,0 +1 @@
+"""Integration tests package."""
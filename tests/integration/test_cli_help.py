@@ -0,0 +1,43 @@
+"""Subprocess-based checks of the tbase-extractor command line entry point.
+
+Deselected by default; run with ``pytest -m integration``.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+pytestmark = [pytest.mark.integration, pytest.mark.slow]
+
+
+class TestCliEntryPoint:
+    """Test the installed module entry point in a fresh interpreter."""
+
+    def test_python_m_entry_point(self):
+        """Smoke test that `python -m tbase_extractor` resolves and runs."""
+        result = subprocess.run(
+            [sys.executable, "-m", "tbase_extractor", "--help"],
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+            timeout=60,
+            check=False,
+        )
+
+        assert result.returncode == 0
+        assert "usage" in result.stdout
+
+    def test_startup_does_not_import_tabulate(self):
+        """Test that tabulate is only loaded when a console table is printed."""
+        result = subprocess.run(
+            [sys.executable, "-c", "import sys, tbase_extractor.main; print('tabulate' in sys.modules)"],
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+            timeout=60,
+            check=False,
+        )
+
+        assert result.returncode == 0
+        assert result.stdout.strip() == "False"
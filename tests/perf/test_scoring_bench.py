@@ -0,0 +1,42 @@
+"""Benchmarks for candidate scoring.
+
+Deselected by default; run with ``pytest -m perf`` (requires pytest-benchmark).
+Compare against a saved run with ``--benchmark-autosave`` / ``--benchmark-compare``.
+"""
+
+from datetime import date
+from types import MappingProxyType
+
+import pytest
+
+from tbase_extractor.matching.models import MatchCandidate, MatchInfo, ScoreTable
+
+pytestmark = pytest.mark.perf
+
+pytest.importorskip("pytest_benchmark")
+
+FIELD_WEIGHTS = MappingProxyType({"FirstName": 0.3, "LastName": 0.4, "DOB": 0.3})
+# Resolved once, as PatientSearchStrategy does for all candidates of a search
+SCORE_TABLE = ScoreTable.from_mapping({"Exact": 1.0, "Fuzzy": "use_similarity", "YearMismatch": 0.7, "Mismatch": 0.0})
+
+# One realistic verdict set per candidate: exact first name, fuzzy last name, DOB off by a year
+MATCH_FIELDS = (
+    MatchInfo("FirstName", "Hans", "Hans", "Exact", 1.0),
+    MatchInfo("LastName", "Mueller", "Müller", "Fuzzy", 0.9),
+    MatchInfo("DOB", date(1980, 5, 15), date(1981, 5, 15), "YearMismatch", 0.7),
+)
+
+
+@pytest.mark.parametrize("n", [10, 100, 1000, 10_000])
+def test_bench_score_candidates(benchmark, n):
+    """Benchmark scoring n candidates for one input row."""
+    candidates = [MatchCandidate(db_record={"PatientID": i}, match_fields_info=list(MATCH_FIELDS)) for i in range(n)]
+
+    def score_all():
+        for candidate in candidates:
+            candidate.calculate_overall_score_and_type(FIELD_WEIGHTS, SCORE_TABLE)
+        return [candidate.overall_score for candidate in candidates]
+
+    scores = benchmark.pedantic(score_all, rounds=20, warmup_rounds=3)
+
+    assert scores == pytest.approx([0.87] * n)
@@ -0,0 +1 @@
+"""Matching unit tests package."""
@@ -1,8 +1,10 @@
 """Unit tests for tbase_extractor.matching.fuzzy_matchers module."""
 
 from datetime import date
+from unittest.mock import Mock
 
 import pytest
+from rapidfuzz import fuzz
 
 from tbase_extractor.matching.fuzzy_matchers import FuzzyMatcher
 from tbase_extractor.matching.models import MatchInfo
@@ -23,6 +25,17 @@ class TestFuzzyMatcherInitialization:
         assert matcher.string_similarity_threshold == 0.9
         assert matcher.date_year_tolerance == 2
 
+    def test_custom_scorer(self):
+        """Test that a custom rapidfuzz scorer is used for similarity."""
+        matcher = FuzzyMatcher(scorer=fuzz.ratio)
+
+        assert matcher.scorer is fuzz.ratio
+        assert matcher.calculate_string_similarity("smith", "smyth") == fuzz.ratio("smith", "smyth") / 100.0
+
+    def test_default_scorer_is_wratio(self):
+        """Test that WRatio is the default scorer."""
+        assert FuzzyMatcher().scorer is fuzz.WRatio
+
     def test_invalid_threshold_too_low(self):
         """Test initialization with threshold below 0.0."""
         with pytest.raises(ValueError, match="string_similarity_threshold must be between 0.0 and 1.0"):
@@ -75,14 +88,25 @@ class TestCalculateStringSimilarity:
         similarity = fuzzy_matcher.calculate_string_similarity("", "hello")
         assert similarity == 0.0
 
+    def test_trivial_inputs_skip_rapidfuzz(self):
+        """Test that empty and identical inputs are scored without calling the scorer."""
+        scorer = Mock(return_value=50.0)
+        matcher = FuzzyMatcher(scorer=scorer)
+
+        assert matcher.calculate_string_similarity("", "") == 0.0
+        assert matcher.calculate_string_similarity("hello", "") == 0.0
+        assert matcher.calculate_string_similarity("hello", "hello") == 1.0
+
+        scorer.assert_not_called()
+
     def test_case_sensitivity(self, fuzzy_matcher):
         """Test that similarity calculation handles case differences."""
         similarity = fuzzy_matcher.calculate_string_similarity("Hello", "hello")
         assert similarity >= 0.8  # Should be very similar despite case difference
 
-    def test_return_type_and_range(self, fuzzy_matcher):
-        """Test that similarity always returns float in [0.0, 1.0] range."""
-        test_pairs = [
+    @pytest.mark.parametrize(
+        "str1,str2",
+        [
             ("test", "test"),
             ("test", "TEST"),
             ("hello", "world"),
@@ -90,12 +114,13 @@ class TestCalculateStringSimilarity:
             ("a", ""),
             ("", "b"),
             ("similar", "similiar"),  # Common typo
-        ]
-
-        for str1, str2 in test_pairs:
-            similarity = fuzzy_matcher.calculate_string_similarity(str1, str2)
-            assert isinstance(similarity, float)
-            assert 0.0 <= similarity <= 1.0
+        ],
+    )
+    def test_return_type_and_range(self, fuzzy_matcher, str1, str2):
+        """Test that similarity always returns float in [0.0, 1.0] range."""
+        similarity = fuzzy_matcher.calculate_string_similarity(str1, str2)
+        assert isinstance(similarity, float)
+        assert 0.0 <= similarity <= 1.0
 
 
 class TestCompareNames:
@@ -170,11 +195,8 @@ class TestCompareNames:
         assert result.match_type == "Exact"
         assert result.similarity_score == 1.0
 
-    def test_different_thresholds(self):
+    def test_different_thresholds(self, high_threshold_matcher, low_threshold_matcher):
         """Test behavior with different similarity thresholds."""
-        high_threshold_matcher = FuzzyMatcher(string_similarity_threshold=0.95)
-        low_threshold_matcher = FuzzyMatcher(string_similarity_threshold=0.3)
-
         # Test case that might pass low threshold but fail high threshold
         input_name = "Smith"
         db_name = "Smyth"
@@ -189,6 +211,38 @@ class TestCompareNames:
         # But similarity scores should be the same
         assert high_result.similarity_score == low_result.similarity_score
 
+    def test_repeated_pair_is_scored_once(self):
+        """Test that a normalized name pair is scored once across calls and casings."""
+        calls = []
+
+        def counting_scorer(name1, name2):
+            calls.append((name1, name2))
+            return fuzz.WRatio(name1, name2)
+
+        matcher = FuzzyMatcher(scorer=counting_scorer)
+        first = matcher.compare_names("LastName", "Schmidt", "Schmitt")
+        second = matcher.compare_names("LastName", " SCHMIDT ", "schmitt")
+
+        assert calls == [("schmidt", "schmitt")]
+        assert first.similarity_score == second.similarity_score
+
+    def test_caches_are_scoped_to_the_matcher(self):
+        """Test that scores are not shared between matchers and are dropped by clear_caches."""
+        calls = []
+
+        def counting_scorer(name1, name2):
+            calls.append((name1, name2))
+            return fuzz.WRatio(name1, name2)
+
+        matcher = FuzzyMatcher(scorer=counting_scorer)
+        matcher.compare_names("LastName", "Schmidt", "Schmitt")
+        FuzzyMatcher(scorer=counting_scorer).compare_names("LastName", "Schmidt", "Schmitt")
+        assert len(calls) == 2
+
+        matcher.clear_caches()
+        matcher.compare_names("LastName", "Schmidt", "Schmitt")
+        assert len(calls) == 3
+
 
 class TestCompareDates:
     """Test date comparison functionality."""
@@ -262,16 +316,13 @@ class TestCompareDates:
         assert result.match_type == "NotCompared"
         assert "Input DOB not provided" in result.details
 
-    def test_year_tolerance_configuration(self):
+    def test_year_tolerance_configuration(self, strict_date_matcher, lenient_date_matcher):
         """Test different year tolerance settings."""
-        strict_matcher = FuzzyMatcher(date_year_tolerance=0)
-        lenient_matcher = FuzzyMatcher(date_year_tolerance=3)
-
         input_date = date(1980, 5, 15)
         db_date = date(1982, 5, 15)  # 2 years difference
 
-        strict_result = strict_matcher.compare_dates(input_date, db_date)
-        lenient_result = lenient_matcher.compare_dates(input_date, db_date)
+        strict_result = strict_date_matcher.compare_dates(input_date, db_date)
+        lenient_result = lenient_date_matcher.compare_dates(input_date, db_date)
 
         # Strict should be mismatch (tolerance=0, diff=2)
         assert strict_result.match_type == "Mismatch"
@@ -292,59 +343,60 @@ class TestCompareDates:
         # Should be mismatch since day is different
         assert result.match_type == "Mismatch"
 
-    def test_year_mismatch_boundary(self, fuzzy_matcher):
+    @pytest.mark.parametrize(
+        "db_date,expected_type",
+        [
+            (date(1981, 5, 15), "YearMismatch"),  # Exactly at tolerance (1 year)
+            (date(1982, 5, 15), "Mismatch"),  # Just beyond tolerance (2 years)
+        ],
+        ids=["at_tolerance", "beyond_tolerance"],
+    )
+    def test_year_mismatch_boundary(self, fuzzy_matcher, db_date, expected_type):
         """Test year mismatch at exact tolerance boundary."""
-        input_date = date(1980, 5, 15)
-
-        # Exactly at tolerance (1 year)
-        db_date_at_tolerance = date(1981, 5, 15)
-        result_at = fuzzy_matcher.compare_dates(input_date, db_date_at_tolerance)
-        assert result_at.match_type == "YearMismatch"
-
-        # Just beyond tolerance (2 years)
-        db_date_beyond = date(1982, 5, 15)
-        result_beyond = fuzzy_matcher.compare_dates(input_date, db_date_beyond)
-        assert result_beyond.match_type == "Mismatch"
+        result = fuzzy_matcher.compare_dates(date(1980, 5, 15), db_date)
+        assert result.match_type == expected_type
 
 
 @pytest.mark.unit
 class TestFuzzyMatcherIntegration:
     """Integration tests for FuzzyMatcher functionality."""
 
-    def test_realistic_name_scenarios(self, fuzzy_matcher):
-        """Test realistic name matching scenarios."""
-        test_cases = [
-            # (input, db_value, expected_match_type) - Updated to reflect actual algorithm behavior with 0.85 threshold
+    @pytest.mark.parametrize(
+        "input_name,db_name,expected_type",
+        [
+            # Expected types reflect actual algorithm behavior with the 0.85 threshold
             ("Smith", "Smith", "Exact"),
             ("Smith", "Smyth", "Mismatch"),  # Similarity ~0.80, below 0.85 threshold
             ("McDonald", "MacDonald", "Fuzzy"),  # Similarity ~0.94, above threshold
             ("O'Connor", "OConnor", "Fuzzy"),  # Similarity ~0.93, above threshold
             ("Müller", "Mueller", "Mismatch"),  # Similarity ~0.77, below 0.85 threshold
             ("Jones", "Jackson", "Mismatch"),  # Completely different
-        ]
-
-        for input_name, db_name, expected_type in test_cases:
-            result = fuzzy_matcher.compare_names("LastName", input_name, db_name)
-            assert (
-                result.match_type == expected_type
-            ), f"Failed for {input_name} vs {db_name} (got {result.match_type}, similarity: {result.similarity_score})"
-
-    def test_realistic_date_scenarios(self, fuzzy_matcher):
-        """Test realistic date matching scenarios."""
-        base_date = date(1980, 5, 15)
-
-        test_cases = [
-            # (input_date, db_date, expected_match_type)
-            (base_date, base_date, "Exact"),
-            (base_date, date(1981, 5, 15), "YearMismatch"),  # 1 year off
-            (base_date, date(1980, 5, 16), "Mismatch"),  # Different day
-            (base_date, date(1980, 6, 15), "Mismatch"),  # Different month
-            (base_date, date(1975, 5, 15), "Mismatch"),  # Too many years off
-        ]
-
-        for input_date, db_date, expected_type in test_cases:
-            result = fuzzy_matcher.compare_dates(input_date, db_date)
-            assert result.match_type == expected_type, f"Failed for {input_date} vs {db_date}"
+        ],
+        ids=["exact", "smyth", "macdonald", "apostrophe", "umlaut", "different"],
+    )
+    def test_realistic_name_scenarios(self, fuzzy_matcher, input_name, db_name, expected_type):
+        """Test realistic name matching scenarios."""
+        result = fuzzy_matcher.compare_names("LastName", input_name, db_name)
+        assert (
+            result.match_type == expected_type
+        ), f"Failed for {input_name} vs {db_name} (got {result.match_type}, similarity: {result.similarity_score})"
+
+    @pytest.mark.parametrize(
+        "db_date,expected_type",
+        [
+            (date(1980, 5, 15), "Exact"),
+            (date(1981, 5, 15), "YearMismatch"),  # 1 year off
+            (date(1980, 5, 16), "Mismatch"),  # Different day
+            (date(1980, 6, 15), "Mismatch"),  # Different month
+            (date(1975, 5, 15), "Mismatch"),  # Too many years off
+        ],
+        ids=["exact", "one-year-off", "different-day", "different-month", "many-years-off"],
+    )
+    def test_realistic_date_scenarios(self, fuzzy_matcher, db_date, expected_type):
+        """Test realistic date matching scenarios against 1980-05-15."""
+        input_date = date(1980, 5, 15)
+        result = fuzzy_matcher.compare_dates(input_date, db_date)
+        assert result.match_type == expected_type, f"Failed for {input_date} vs {db_date}"
 
     def test_match_info_consistency(self, fuzzy_matcher):
         """Test that MatchInfo objects are consistently structured."""
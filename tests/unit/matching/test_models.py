@@ -1,11 +1,27 @@
 """Unit tests for tbase_extractor.matching.models module."""
 
+import math
+from dataclasses import FrozenInstanceError
 from datetime import date
+from types import MappingProxyType
 from typing import Dict, Union
 
 import pytest
 
-from tbase_extractor.matching.models import MatchCandidate, MatchInfo
+from tbase_extractor.matching.models import MatchCandidate, MatchInfo, ScoreTable
+from tests._asserts import assert_valid_match_info
+
+
+@pytest.fixture(scope="module")
+def default_field_weights():
+    """Field weights shared by the scoring tests (read-only)."""
+    return MappingProxyType({"FirstName": 0.3, "LastName": 0.4, "DOB": 0.3})
+
+
+@pytest.fixture(scope="module")
+def default_score_mapping():
+    """Score mapping shared by the scoring tests (read-only)."""
+    return MappingProxyType({"Exact": 1.0, "Fuzzy": "use_similarity", "Mismatch": 0.0})
 
 
 class TestMatchInfo:
@@ -67,6 +83,14 @@ class TestMatchInfo:
 
         assert match1 == match2
         assert match1 != match3
+        assert hash(match1) == hash(match2)
+
+    def test_immutable(self):
+        """Test that MatchInfo fields cannot be reassigned."""
+        match_info = MatchInfo("Field", "Value1", "Value2", "Fuzzy", 0.8)
+
+        with pytest.raises(FrozenInstanceError):
+            match_info.similarity_score = 0.9  # type: ignore[misc]
 
     def test_repr_and_str(self):
         """Test string representation of MatchInfo."""
@@ -102,13 +126,15 @@ class TestMatchCandidate:
         db_record = {"PatientID": 1001, "Name": "Müller"}
         candidate = MatchCandidate(
             db_record=db_record,
-            match_fields_info=sample_match_info,
+            match_fields_info=list(sample_match_info),
             overall_score=0.95,
             primary_match_type="Exact Match",
         )
 
         assert candidate.db_record == db_record
-        assert candidate.match_fields_info == sample_match_info
+        assert candidate.match_fields_info == list(sample_match_info)
+        for match_info in candidate.match_fields_info:
+            assert_valid_match_info(match_info)
         assert candidate.overall_score == 0.95
         assert candidate.primary_match_type == "Exact Match"
 
@@ -126,7 +152,7 @@ class TestMatchCandidate:
 class TestCalculateOverallScoreAndType:
     """Test MatchCandidate.calculate_overall_score_and_type method."""
 
-    def test_exact_match_all_fields(self):
+    def test_exact_match_all_fields(self, default_field_weights, default_score_mapping):
         """Test calculation with all exact matches."""
         db_record = {"PatientID": 1001, "Name": "Müller", "Vorname": "Hans"}
         match_fields = [
@@ -137,10 +163,7 @@ class TestCalculateOverallScoreAndType:
 
         candidate = MatchCandidate(db_record=db_record, match_fields_info=match_fields)
 
-        field_weights = {"FirstName": 0.3, "LastName": 0.4, "DOB": 0.3}
-        score_mapping: Dict[str, Union[float, str]] = {"Exact": 1.0, "Fuzzy": "use_similarity", "Mismatch": 0.0}
-
-        candidate.calculate_overall_score_and_type(field_weights, score_mapping)
+        candidate.calculate_overall_score_and_type(default_field_weights, default_score_mapping)
 
         assert candidate.overall_score == 1.0
         assert candidate.primary_match_type == "Exact Match"
@@ -174,7 +197,7 @@ class TestCalculateOverallScoreAndType:
         assert "Fuzzy" in candidate.primary_match_type
         assert "YearMismatch" in candidate.primary_match_type
 
-    def test_no_significant_match(self):
+    def test_no_significant_match(self, default_field_weights, default_score_mapping):
         """Test calculation with very low scores."""
         db_record = {"PatientID": 1001}
         match_fields = [
@@ -185,10 +208,7 @@ class TestCalculateOverallScoreAndType:
 
         candidate = MatchCandidate(db_record=db_record, match_fields_info=match_fields)
 
-        field_weights = {"FirstName": 0.3, "LastName": 0.4, "DOB": 0.3}
-        score_mapping: Dict[str, Union[float, str]] = {"Exact": 1.0, "Fuzzy": "use_similarity", "Mismatch": 0.0}
-
-        candidate.calculate_overall_score_and_type(field_weights, score_mapping)
+        candidate.calculate_overall_score_and_type(default_field_weights, default_score_mapping)
 
         assert candidate.overall_score == 0.0
         assert candidate.primary_match_type == "No Significant Match"
@@ -302,6 +322,35 @@ class TestCalculateOverallScoreAndType:
         assert candidate.primary_match_type == "No Significant Match"
 
 
+class TestScoreTable:
+    """Test ScoreTable resolution of score mappings."""
+
+    def test_from_mapping(self):
+        """Test that numbers become floats, use_similarity the NaN sentinel, and other values are dropped."""
+        table = ScoreTable.from_mapping({"Exact": 1, "Fuzzy": "use_similarity", "Odd": "unknown"})
+
+        assert table["Exact"] == 1.0
+        assert math.isnan(table["Fuzzy"])
+        assert "Odd" not in table
+
+    def test_prepared_table_scores_like_mapping(self):
+        """Test that scoring with a prebuilt ScoreTable matches scoring with the raw mapping."""
+        match_fields = [
+            MatchInfo("FirstName", "Hans", "Hans", "Exact", 1.0),
+            MatchInfo("LastName", "Smith", "Smyth", "Fuzzy", 0.85),
+        ]
+        field_weights = {"FirstName": 0.5, "LastName": 0.5}
+        score_mapping: Dict[str, Union[float, str]] = {"Exact": 1.0, "Fuzzy": "use_similarity"}
+
+        from_mapping = MatchCandidate(db_record={}, match_fields_info=list(match_fields))
+        from_mapping.calculate_overall_score_and_type(field_weights, score_mapping)
+        from_table = MatchCandidate(db_record={}, match_fields_info=list(match_fields))
+        from_table.calculate_overall_score_and_type(field_weights, ScoreTable.from_mapping(score_mapping))
+
+        assert from_table.overall_score == from_mapping.overall_score
+        assert from_table.primary_match_type == from_mapping.primary_match_type
+
+
 @pytest.mark.unit
 class TestMatchingModelsIntegration:
     """Integration tests for matching models."""
@@ -354,7 +403,7 @@ class TestMatchingModelsIntegration:
         assert candidate.csv_input_data is not None
         assert candidate.csv_input_data["FirstName"] == "Hans"
 
-    def test_field_match_summaries_ordering(self):
+    def test_field_match_summaries_ordering(self, default_field_weights, default_score_mapping):
         """Test that field match summaries are consistently ordered."""
         db_record = {"PatientID": 1001}
         match_fields = [
@@ -365,10 +414,7 @@ class TestMatchingModelsIntegration:
 
         candidate = MatchCandidate(db_record=db_record, match_fields_info=match_fields)
 
-        field_weights = {"FirstName": 0.3, "LastName": 0.4, "DOB": 0.3}
-        score_mapping: Dict[str, Union[float, str]] = {"Exact": 1.0, "Fuzzy": "use_similarity", "Mismatch": 0.0}
-
-        candidate.calculate_overall_score_and_type(field_weights, score_mapping)
+        candidate.calculate_overall_score_and_type(default_field_weights, default_score_mapping)
 
         # Match types should be sorted alphabetically in the summary
         assert candidate.primary_match_type.startswith("Partial Match:")
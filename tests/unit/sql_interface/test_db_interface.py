@@ -1,7 +1,7 @@
 """Unit tests for tbase_extractor.sql_interface.db_interface module."""
 
 from datetime import date, datetime
-from unittest.mock import MagicMock, patch
+from unittest.mock import Mock, patch
 
 try:
     import pyodbc
@@ -24,16 +24,33 @@ import pytest
 
 from tbase_extractor.sql_interface.db_interface import SQLInterface
 
+DB_ENV = {"SQL_SERVER": "test_server", "DATABASE": "test_db", "USERNAME_SQL": "test_user", "PASSWORD": "test_pass"}
+
+
+@pytest.fixture
+def db_env(monkeypatch):
+    """Set the connection environment variables SQLInterface reads."""
+    for name, value in DB_ENV.items():
+        monkeypatch.setenv(name, value)
+
+
+@pytest.fixture
+def mock_connection():
+    """Connection mock restricted to the pyodbc.Connection API where pyodbc is installed."""
+    return Mock(spec=getattr(pyodbc, "Connection", None))
+
+
+@pytest.fixture
+def mock_cursor():
+    """Cursor mock restricted to the pyodbc.Cursor API where pyodbc is installed."""
+    return Mock(spec=getattr(pyodbc, "Cursor", None))
+
 
 class TestSQLInterfaceInit:
     """Test SQLInterface initialization."""
 
-    def test_init_with_environment_variables(self, monkeypatch):
+    def test_init_with_environment_variables(self, monkeypatch, db_env):
         """Test initialization with environment variables."""
-        monkeypatch.setenv("SQL_SERVER", "test_server")
-        monkeypatch.setenv("DATABASE", "test_db")
-        monkeypatch.setenv("USERNAME_SQL", "test_user")
-        monkeypatch.setenv("PASSWORD", "test_pass")
         monkeypatch.setenv("SQL_DRIVER", "{Custom Driver}")
 
         sql_interface = SQLInterface()
@@ -73,6 +90,15 @@ class TestCleanFieldValue:
             result = SQLInterface._clean_field_value(value)
             assert result == value
 
+    def test_clean_string_subclass(self):
+        """Test that str subclasses are cleaned like plain strings."""
+
+        class Text(str):
+            pass
+
+        result = SQLInterface._clean_field_value(Text("<p>Line 1</p>\n\n\nLine 2 "))
+        assert result == "Line 1\nLine 2"
+
     def test_clean_simple_string(self):
         """Test cleaning simple string without HTML."""
         text = "Simple text"
@@ -110,6 +136,32 @@ class TestCleanFieldValue:
         result = SQLInterface._clean_field_value(text)
         assert result == "Line 1\nLine 2\nLine 3"
 
+    def test_clean_plain_text_skips_html_parsing(self):
+        """Test that text without entities or tags is cleaned without BeautifulSoup."""
+        with patch("tbase_extractor.sql_interface.db_interface.BeautifulSoup") as mock_soup:
+            result = SQLInterface._clean_field_value("  Line 1\n\nLine 2  ")
+
+        mock_soup.assert_not_called()
+        assert result == "Line 1\nLine 2"
+
+    def test_repeated_html_value_parsed_once(self, mock_cursor):
+        """Test that a repeated HTML value is parsed once per instance and the cache is cleared on close."""
+        sql_interface = SQLInterface()
+        other = SQLInterface()
+        mock_cursor.description = [("note",)]
+        mock_cursor.fetchmany.side_effect = [[("<p>Repeated &amp; cached</p>",)] * 3, []]
+        sql_interface.cursor = mock_cursor
+        other.cursor = Mock(description=[("note",)])
+        other.cursor.fetchmany.side_effect = [[("<p>Repeated &amp; cached</p>",)], []]
+
+        assert sql_interface.fetch_results() == [{"note": "Repeated & cached"}] * 3
+        assert other.fetch_results() == [{"note": "Repeated & cached"}]
+
+        assert sql_interface._clean_html_text.cache_info().misses == 1
+        sql_interface.close_connection()
+        assert sql_interface._clean_html_text.cache_info().currsize == 0
+        assert other._clean_html_text.cache_info().currsize == 1
+
     def test_clean_whitespace_stripping(self):
         """Test stripping leading and trailing whitespace."""
         text = "   Content with spaces   "
@@ -154,18 +206,11 @@ class TestConnectionManagement:
     """Test connection management methods."""
 
     @patch("tbase_extractor.sql_interface.db_interface.pyodbc")
-    def test_connect_success(self, mock_pyodbc, monkeypatch):
+    def test_connect_success(self, mock_pyodbc, monkeypatch, mock_connection, mock_cursor, db_env):
         """Test successful database connection."""
-        # Set up environment
-        monkeypatch.setenv("SQL_SERVER", "test_server")
-        monkeypatch.setenv("DATABASE", "test_db")
-        monkeypatch.setenv("USERNAME_SQL", "test_user")
-        monkeypatch.setenv("PASSWORD", "test_pass")
         monkeypatch.setenv("SQL_DRIVER", "{Test Driver}")
 
         # Mock pyodbc
-        mock_connection = MagicMock()
-        mock_cursor = MagicMock()
         mock_connection.cursor.return_value = mock_cursor
         mock_pyodbc.connect.return_value = mock_connection
 
@@ -194,13 +239,8 @@ class TestConnectionManagement:
         assert sql_interface.cursor is None
 
     @patch("tbase_extractor.sql_interface.db_interface.pyodbc")
-    def test_connect_pyodbc_error(self, mock_pyodbc, monkeypatch):
+    def test_connect_pyodbc_error(self, mock_pyodbc, db_env):
         """Test connection failure due to pyodbc error."""
-        # Set up environment
-        monkeypatch.setenv("SQL_SERVER", "test_server")
-        monkeypatch.setenv("DATABASE", "test_db")
-        monkeypatch.setenv("USERNAME_SQL", "test_user")
-        monkeypatch.setenv("PASSWORD", "test_pass")
 
         # Mock pyodbc to raise error
         mock_pyodbc.connect.side_effect = pyodbc.Error("08001", "Connection failed")
@@ -213,26 +253,20 @@ class TestConnectionManagement:
         assert sql_interface.cursor is None
 
     @patch("tbase_extractor.sql_interface.db_interface.pyodbc")
-    def test_connect_already_connected(self, mock_pyodbc, monkeypatch):
+    def test_connect_already_connected(self, mock_pyodbc, mock_connection, db_env):
         """Test connecting when already connected."""
-        monkeypatch.setenv("SQL_SERVER", "test_server")
-        monkeypatch.setenv("DATABASE", "test_db")
-        monkeypatch.setenv("USERNAME_SQL", "test_user")
-        monkeypatch.setenv("PASSWORD", "test_pass")
 
         sql_interface = SQLInterface()
-        sql_interface.connection = MagicMock()  # Simulate existing connection
+        sql_interface.connection = mock_connection  # Simulate existing connection
 
         result = sql_interface.connect()
 
         assert result is True
         mock_pyodbc.connect.assert_not_called()
 
-    def test_close_connection_success(self):
+    def test_close_connection_success(self, mock_connection, mock_cursor):
         """Test successful connection closure."""
         sql_interface = SQLInterface()
-        mock_connection = MagicMock()
-        mock_cursor = MagicMock()
 
         sql_interface.connection = mock_connection
         sql_interface.cursor = mock_cursor
@@ -242,13 +276,11 @@ class TestConnectionManagement:
         mock_cursor.close.assert_called_once()
         mock_connection.close.assert_called_once()
         assert sql_interface.connection is None
-        # assert sql_interface.cursor is None  # This is unreachable after connection is None
+        assert sql_interface.cursor is None
 
-    def test_close_connection_cursor_error(self):
+    def test_close_connection_cursor_error(self, mock_connection, mock_cursor):
         """Test connection closure with cursor error."""
         sql_interface = SQLInterface()
-        mock_connection = MagicMock()
-        mock_cursor = MagicMock()
         mock_cursor.close.side_effect = pyodbc.Error("Error closing cursor")
 
         sql_interface.connection = mock_connection
@@ -259,7 +291,7 @@ class TestConnectionManagement:
         # Should still close connection and set cursor to None
         mock_connection.close.assert_called_once()
         assert sql_interface.cursor is None
-        # assert sql_interface.connection is None  # This is unreachable after cursor check
+        assert sql_interface.connection is None
 
     def test_close_connection_no_connection(self):
         """Test closing when no connection exists."""
@@ -276,15 +308,9 @@ class TestContextManager:
     """Test context manager functionality."""
 
     @patch("tbase_extractor.sql_interface.db_interface.pyodbc")
-    def test_context_manager_success(self, mock_pyodbc, monkeypatch):
+    def test_context_manager_success(self, mock_pyodbc, mock_connection, mock_cursor, db_env):
         """Test successful context manager usage."""
-        monkeypatch.setenv("SQL_SERVER", "test_server")
-        monkeypatch.setenv("DATABASE", "test_db")
-        monkeypatch.setenv("USERNAME_SQL", "test_user")
-        monkeypatch.setenv("PASSWORD", "test_pass")
 
-        mock_connection = MagicMock()
-        mock_cursor = MagicMock()
         mock_connection.cursor.return_value = mock_cursor
         mock_pyodbc.connect.return_value = mock_connection
 
@@ -307,11 +333,9 @@ class TestContextManager:
 class TestQueryExecution:
     """Test query execution methods."""
 
-    def test_execute_query_success(self):
+    def test_execute_query_success(self, mock_connection, mock_cursor):
         """Test successful query execution."""
         sql_interface = SQLInterface()
-        mock_connection = MagicMock()
-        mock_cursor = MagicMock()
 
         sql_interface.connection = mock_connection
         sql_interface.cursor = mock_cursor
@@ -329,11 +353,9 @@ class TestQueryExecution:
 
         assert result is False
 
-    def test_execute_query_pyodbc_error(self):
+    def test_execute_query_pyodbc_error(self, mock_connection, mock_cursor):
         """Test query execution with pyodbc error."""
         sql_interface = SQLInterface()
-        mock_connection = MagicMock()
-        mock_cursor = MagicMock()
         mock_cursor.execute.side_effect = pyodbc.Error("42000", "Syntax error")
 
         sql_interface.connection = mock_connection
@@ -345,16 +367,18 @@ class TestQueryExecution:
             assert result is False
             mock_rollback.assert_called_once()
 
-    def test_fetch_results_success(self):
+    def test_fetch_results_success(self, mock_cursor):
         """Test successful result fetching."""
         sql_interface = SQLInterface()
-        mock_cursor = MagicMock()
 
         # Mock cursor description and results
         mock_cursor.description = [("id",), ("name",), ("date",)]
-        mock_cursor.fetchall.return_value = [
-            (1, "Test User", datetime(2023, 1, 1)),
-            (2, "<p>HTML User</p>", datetime(2023, 1, 2)),
+        mock_cursor.fetchmany.side_effect = [
+            [
+                (1, "Test User", datetime(2023, 1, 1)),
+                (2, "<p>HTML User</p>", datetime(2023, 1, 2)),
+            ],
+            [],
         ]
 
         sql_interface.cursor = mock_cursor
@@ -366,7 +390,7 @@ class TestQueryExecution:
         assert results[0] == {"id": 1, "name": "Test User", "date": datetime(2023, 1, 1)}
         assert results[1] == {"id": 2, "name": "HTML User", "date": datetime(2023, 1, 2)}
 
-        mock_cursor.fetchall.assert_called_once()
+        mock_cursor.fetchall.assert_not_called()
 
     def test_fetch_results_no_cursor(self):
         """Test fetching results without cursor."""
@@ -376,10 +400,9 @@ class TestQueryExecution:
 
         assert result is None
 
-    def test_fetch_results_no_description(self):
+    def test_fetch_results_no_description(self, mock_cursor):
         """Test fetching results when cursor has no description."""
         sql_interface = SQLInterface()
-        mock_cursor = MagicMock()
         mock_cursor.description = None
 
         sql_interface.cursor = mock_cursor
@@ -388,12 +411,11 @@ class TestQueryExecution:
 
         assert result == []
 
-    def test_fetch_results_pyodbc_error(self):
+    def test_fetch_results_pyodbc_error(self, mock_cursor):
         """Test fetching results with pyodbc error."""
         sql_interface = SQLInterface()
-        mock_cursor = MagicMock()
         mock_cursor.description = [("id",)]
-        mock_cursor.fetchall.side_effect = pyodbc.Error("Error fetching")
+        mock_cursor.fetchmany.side_effect = pyodbc.Error("Error fetching")
 
         sql_interface.cursor = mock_cursor
 
@@ -401,14 +423,47 @@ class TestQueryExecution:
 
         assert result is None
 
+    def test_iter_results_fetches_in_batches(self, mock_cursor):
+        """Test that iter_results yields cleaned rows batch by batch."""
+        sql_interface = SQLInterface()
+        mock_cursor.description = [("id",), ("name",)]
+        mock_cursor.fetchmany.side_effect = [[(1, "Test User"), (2, "<p>HTML User</p>")], [(3, "Last")], []]
+
+        sql_interface.cursor = mock_cursor
+
+        results = list(sql_interface.iter_results(batch_size=2))
+
+        assert results == [
+            {"id": 1, "name": "Test User"},
+            {"id": 2, "name": "HTML User"},
+            {"id": 3, "name": "Last"},
+        ]
+        assert mock_cursor.fetchmany.call_count == 3
+        mock_cursor.fetchmany.assert_called_with(2)
+        mock_cursor.fetchall.assert_not_called()
+
+    def test_iter_results_no_cursor(self):
+        """Test that iter_results yields nothing without a cursor."""
+        assert list(SQLInterface().iter_results()) == []
+
+    def test_iter_results_pyodbc_error(self, mock_cursor):
+        """Test that fetch errors are re-raised rather than ending the iteration silently."""
+        sql_interface = SQLInterface()
+        mock_cursor.description = [("id",)]
+        mock_cursor.fetchmany.side_effect = pyodbc.Error("Error fetching")
+
+        sql_interface.cursor = mock_cursor
+
+        with pytest.raises(pyodbc.Error):
+            list(sql_interface.iter_results())
+
 
 class TestTransactionManagement:
     """Test transaction management methods."""
 
-    def test_commit_success(self):
+    def test_commit_success(self, mock_connection):
         """Test successful transaction commit."""
         sql_interface = SQLInterface()
-        mock_connection = MagicMock()
         sql_interface.connection = mock_connection
 
         result = sql_interface.commit()
@@ -424,10 +479,9 @@ class TestTransactionManagement:
 
         assert result is False
 
-    def test_commit_pyodbc_error(self):
+    def test_commit_pyodbc_error(self, mock_connection):
         """Test commit with pyodbc error."""
         sql_interface = SQLInterface()
-        mock_connection = MagicMock()
         mock_connection.commit.side_effect = pyodbc.Error("Commit failed")
         sql_interface.connection = mock_connection
 
@@ -437,10 +491,9 @@ class TestTransactionManagement:
             assert result is False
             mock_rollback.assert_called_once()
 
-    def test_rollback_success(self):
+    def test_rollback_success(self, mock_connection):
         """Test successful rollback."""
         sql_interface = SQLInterface()
-        mock_connection = MagicMock()
         sql_interface.connection = mock_connection
 
         sql_interface._rollback()
@@ -454,10 +507,9 @@ class TestTransactionManagement:
         # Should not raise error
         sql_interface._rollback()
 
-    def test_rollback_pyodbc_error(self):
+    def test_rollback_pyodbc_error(self, mock_connection):
         """Test rollback with pyodbc error."""
         sql_interface = SQLInterface()
-        mock_connection = MagicMock()
         mock_connection.rollback.side_effect = pyodbc.Error("Rollback failed")
         sql_interface.connection = mock_connection
 
@@ -470,20 +522,13 @@ class TestSQLInterfaceIntegration:
     """Integration tests for SQLInterface functionality."""
 
     @patch("tbase_extractor.sql_interface.db_interface.pyodbc")
-    def test_full_query_cycle(self, mock_pyodbc, monkeypatch):
+    def test_full_query_cycle(self, mock_pyodbc, mock_connection, mock_cursor, db_env):
         """Test complete query execution cycle."""
-        # Set up environment
-        monkeypatch.setenv("SQL_SERVER", "test_server")
-        monkeypatch.setenv("DATABASE", "test_db")
-        monkeypatch.setenv("USERNAME_SQL", "test_user")
-        monkeypatch.setenv("PASSWORD", "test_pass")
 
         # Mock pyodbc
-        mock_connection = MagicMock()
-        mock_cursor = MagicMock()
         mock_connection.cursor.return_value = mock_cursor
         mock_cursor.description = [("id",), ("name",)]
-        mock_cursor.fetchall.return_value = [(1, "Test User")]
+        mock_cursor.fetchmany.side_effect = [[(1, "Test User")], []]
         mock_pyodbc.connect.return_value = mock_connection
 
         sql_interface = SQLInterface()
@@ -506,16 +551,10 @@ class TestSQLInterfaceIntegration:
         assert sql_interface.connection is None
         assert sql_interface.cursor is None
 
-    def test_debug_mode_logging(self, monkeypatch, capfd):
+    def test_debug_mode_logging(self, capfd, mock_connection, mock_cursor, db_env):
         """Test debug mode produces appropriate output."""
-        monkeypatch.setenv("SQL_SERVER", "test_server")
-        monkeypatch.setenv("DATABASE", "test_db")
-        monkeypatch.setenv("USERNAME_SQL", "test_user")
-        monkeypatch.setenv("PASSWORD", "test_pass")
 
         sql_interface = SQLInterface(debug=True)
-        mock_connection = MagicMock()
-        mock_cursor = MagicMock()
 
         sql_interface.connection = mock_connection
         sql_interface.cursor = mock_cursor
@@ -527,15 +566,17 @@ class TestSQLInterfaceIntegration:
         # But we can verify debug flag is properly set
         assert sql_interface.debug is True
 
-    def test_html_cleaning_in_results(self):
+    def test_html_cleaning_in_results(self, mock_cursor):
         """Test that HTML cleaning works in actual result fetching."""
         sql_interface = SQLInterface()
-        mock_cursor = MagicMock()
 
         mock_cursor.description = [("content",)]
-        mock_cursor.fetchall.return_value = [
-            ("<p>HTML content</p><br>New line",),
-            ("&lt;script&gt;alert('test')&lt;/script&gt;",),
+        mock_cursor.fetchmany.side_effect = [
+            [
+                ("<p>HTML content</p><br>New line",),
+                ("&lt;script&gt;alert('test')&lt;/script&gt;",),
+            ],
+            [],
         ]
 
         sql_interface.cursor = mock_cursor
@@ -0,0 +1,72 @@
+"""Unit tests for tbase_extractor.sql_interface.dynamic_query_builder module."""
+
+from tbase_extractor.sql_interface.dynamic_query_builder import PatientQueryBuilder
+
+
+def assert_sql_contains(sql, required):
+    """Assert that every token in ``required`` occurs in ``sql``, reporting all missing ones at once."""
+    missing = [token for token in required if token not in sql]
+    assert not missing, f"Missing {missing} in {sql}"
+
+
+class TestPatientQueryBuilder:
+    """Test PatientQueryBuilder query generation."""
+
+    def test_patient_by_id_with_custom_tables(self):
+        """Test that custom table and schema names are used in the generated SQL."""
+        builder = PatientQueryBuilder("CustomPatient", "CustomDiagnose", "custom_schema")
+
+        sql, params = builder.get_patient_by_id_query(1001, include_diagnoses=True)
+
+        assert_sql_contains(
+            sql,
+            ("custom_schema.CustomPatient p", "custom_schema.CustomDiagnose d", "LEFT JOIN", "p.PatientID = ?"),
+        )
+        assert params == (1001,)
+
+    def test_patient_by_id_without_diagnoses(self):
+        """Test that the diagnosis join is omitted unless requested."""
+        sql, params = PatientQueryBuilder().get_patient_by_id_query(1001)
+
+        assert "JOIN" not in sql
+        assert "d.ICD10" not in sql
+        assert sql.endswith("WHERE p.PatientID = ?")
+        assert params == (1001,)
+
+    def test_patient_by_name_dob(self):
+        """Test name/DOB lookup parameters and conditions."""
+        sql, params = PatientQueryBuilder().get_patient_by_name_dob_query("Hans", "Müller", "1980-05-15")
+
+        assert_sql_contains(sql, ("p.Vorname = ?", "p.Name = ?", "p.Geburtsdatum = ?"))
+        assert params == ("Hans", "Müller", "1980-05-15")
+
+    def test_all_patients_with_limit(self):
+        """Test that a limit adds TOP n."""
+        sql, params = PatientQueryBuilder().get_all_patients_query(limit=10)
+
+        assert sql == "SELECT TOP 10 p.*\nFROM dbo.Patient p"
+        assert params == ()
+
+    def test_lastname_like_adds_wildcard(self):
+        """Test that a trailing wildcard is added only when the pattern has none."""
+        builder = PatientQueryBuilder()
+
+        assert builder.get_patients_by_lastname_like_query("Mu")[1] == ("Mu%",)
+        assert builder.get_patients_by_lastname_like_query("M_ller")[1] == ("M_ller",)
+
+    def test_repeated_calls_return_same_sql(self):
+        """Test that repeated calls with different parameters share the SQL text."""
+        builder = PatientQueryBuilder()
+
+        first_sql, _ = builder.get_patient_by_id_query(1)
+        second_sql, second_params = builder.get_patient_by_id_query(2)
+
+        assert first_sql == second_sql
+        assert second_params == (2,)
+
+    def test_builders_with_same_tables_share_sql_object(self):
+        """Test that compiled SQL is interned across builder instances."""
+        first_sql, _ = PatientQueryBuilder().get_patient_by_id_query(1, include_diagnoses=True)
+        second_sql, _ = PatientQueryBuilder().get_patient_by_id_query(2, include_diagnoses=True)
+
+        assert first_sql is second_sql
@@ -1,9 +1,10 @@
 """Unit tests for tbase_extractor.sql_interface.output_formatter module."""
 
+import csv
 import json
 from datetime import date, datetime
 from io import StringIO
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 
@@ -194,6 +195,46 @@ class TestFormatAsJson:
         assert first_patient["patient_info"]["Name"] == "Müller"
         assert len(first_patient["records"]) == 2  # Two diagnoses for Hans
 
+    def test_json_grouping_merges_interleaved_patient_records(self):
+        """Test that records of the same patient share one group even when not adjacent."""
+        data = [
+            {"PatientID": 1001, "Name": "Müller", "Vorname": "Hans", "ICD10": "E11.9"},
+            {"PatientID": 1002, "Name": "Schmidt", "Vorname": "Anna", "ICD10": "M79.1"},
+            {"PatientID": 1001, "Name": "Müller", "Vorname": "Hans", "ICD10": "I10"},
+        ]
+
+        patients_data = json.loads(OutputFormatter.format_as_json(data))["data"]
+
+        assert [group["patient_info"]["Name"] for group in patients_data] == ["Müller", "Schmidt"]
+        assert [record["ICD10"] for record in patients_data[0]["records"]] == ["E11.9", "I10"]
+        assert [record["ICD10"] for record in patients_data[1]["records"]] == ["M79.1"]
+
+    def test_json_grouping_keeps_same_name_patients_apart(self):
+        """Test that patients sharing a name but not an ID get their own groups."""
+        data = [
+            {"PatientID": 1001, "Name": "Müller", "Vorname": "Hans", "Geburtsdatum": date(1980, 1, 1), "ICD10": "E11"},
+            {"PatientID": 1002, "Name": "Schmidt", "Vorname": "Anna", "Geburtsdatum": date(1975, 5, 5), "ICD10": "M79"},
+            {"PatientID": 1003, "Name": "Müller", "Vorname": "Hans", "Geburtsdatum": date(1990, 9, 9), "ICD10": "I10"},
+        ]
+
+        patients_data = json.loads(OutputFormatter.format_as_json(data))["data"]
+
+        assert [group["patient_info"]["PatientID"] for group in patients_data] == [1001, 1002, 1003]
+        assert patients_data[2]["patient_info"]["Geburtsdatum"] == "1990-09-09"
+        assert [record["ICD10"] for record in patients_data[2]["records"]] == ["I10"]
+
+    def test_json_grouping_patient_info_only_has_present_fields(self):
+        """Test patient_info holds only the patient columns present in the result set."""
+        data = [
+            {"PatientID": 1001, "Name": "Müller", "Vorname": "Hans", "Geburtsdatum": None, "ICD10": "E11.9"},
+            {"PatientID": 1002, "Name": "Schmidt", "Vorname": "Anna", "Geburtsdatum": None, "ICD10": "M79.1"},
+        ]
+
+        parsed = json.loads(OutputFormatter.format_as_json(data))
+
+        assert parsed["data"][0]["patient_info"] == {"Name": "Müller", "Vorname": "Hans", "PatientID": 1001}
+        assert parsed["data"][1]["patient_info"] == {"Name": "Schmidt", "Vorname": "Anna", "PatientID": 1002}
+
     def test_json_with_compact_output(self):
         """Test JSON formatting with compact output (no indentation)."""
         data = [{"test": "value"}]
@@ -204,6 +245,7 @@ class TestFormatAsJson:
         assert "\n" not in result
         # JSON structure itself contains spaces in keys, so just check it's compact
         assert result.startswith('{"metadata"')  # Compact JSON starts without spaces
+        assert result == '{"metadata":{},"data":[{"test":"value"}]}'
 
     def test_json_with_empty_data(self):
         """Test JSON formatting with empty data."""
@@ -221,6 +263,60 @@ class TestFormatAsJson:
         with pytest.raises(TypeError):
             OutputFormatter.format_as_json(data)
 
+    def test_json_patient_info_uses_fields_missing_from_first_record(self):
+        """Test that patient fields absent from the first record still reach later patients' info."""
+        data = [
+            {"Name": "Müller", "Vorname": "Hans", "ICD10": "E11.9"},
+            {"PatientID": 1002, "Name": "Schmidt", "Vorname": "Anna", "ICD10": "M79.1"},
+        ]
+
+        patients = json.loads(OutputFormatter.format_as_json(data))["data"]
+
+        assert patients[0]["patient_info"] == {"Name": "Müller", "Vorname": "Hans"}
+        assert patients[1]["patient_info"] == {"Name": "Schmidt", "Vorname": "Anna", "PatientID": 1002}
+
+    @pytest.mark.parametrize("indent", [None, 2])
+    def test_json_falls_back_for_values_orjson_rejects(self, indent):
+        """Test that integers wider than 64 bits are still encoded, via the json module."""
+        data = [{"PatientID": 2**70}]
+
+        parsed = json.loads(OutputFormatter.format_as_json(data, indent=indent))
+
+        assert parsed["data"] == [{"PatientID": 2**70}]
+
+    @pytest.mark.parametrize("indent", [None, 2, 4])
+    def test_json_output_independent_of_orjson(self, indent):
+        """Test that the orjson fast path and the stdlib fallback produce the same JSON."""
+        data = [
+            {"PatientID": 1001, "Name": "Müller", "Geburtsdatum": date(1980, 5, 15), "Score": 0.5},
+            {"PatientID": 1002, "Name": "Schmidt", "Geburtsdatum": datetime(1975, 1, 2, 3, 4, 5), "Score": None},
+        ]
+
+        result = OutputFormatter.format_as_json(data, indent=indent)
+        with patch("tbase_extractor.sql_interface.output_formatter.HAS_ORJSON", False):
+            fallback = OutputFormatter.format_as_json(data, indent=indent)
+
+        assert json.loads(result) == json.loads(fallback)
+
+    @pytest.mark.parametrize("indent", [None, 2, 4])
+    def test_json_text_identical_across_backends(self, indent):
+        """Test that non-ASCII names are escaped the same way with and without orjson."""
+        data = [{"PatientID": 1001, "Name": "Müller", "Geburtsdatum": date(1980, 5, 15)}]
+
+        result = OutputFormatter.format_as_json(data, indent=indent)
+        with patch("tbase_extractor.sql_interface.output_formatter.HAS_ORJSON", False):
+            fallback = OutputFormatter.format_as_json(data, indent=indent)
+
+        assert result == fallback
+        assert '"M\\u00fcller"' in result
+
+    def test_default_json_escapes_non_ascii(self):
+        """Test that the default (indent=4) output keeps json's ASCII escaping of non-ASCII names."""
+        result = OutputFormatter.format_as_json([{"PatientID": 1001, "Name": "Müller"}])
+
+        assert '"M\\u00fcller"' in result
+        assert "Müller" not in result
+
 
 class TestFormatAsCsv:
     """Test format_as_csv method."""
@@ -258,6 +354,29 @@ class TestFormatAsCsv:
         assert '"Main St, Apt 5"' in result
         assert '"""special"""' in result or '"Has ""special"" needs"' in result
 
+    @pytest.mark.parametrize(
+        "data",
+        [
+            [{"A": 1, "B": "x, y"}, {"A": None, "B": 'q"t'}],  # Uniform columns
+            [{"A": 1, "B": 2}, {"A": 3}],  # Missing column
+            [{"A": 1, "B": 2}, {"B": 3, "A": 4}],  # Same columns, different order
+            [{"A": 1}, {"A": 2}],  # Single column
+        ],
+    )
+    def test_csv_matches_dict_writer(self, data):
+        """Test that CSV output is identical to csv.DictWriter's for uniform and ragged records."""
+        expected = StringIO()
+        writer = csv.DictWriter(expected, fieldnames=data[0].keys())
+        writer.writeheader()
+        writer.writerows(data)
+
+        assert OutputFormatter.format_as_csv(data) == expected.getvalue()
+
+    def test_csv_rejects_unknown_columns(self):
+        """Test that a record with a column missing from the header still raises like csv.DictWriter."""
+        with pytest.raises(ValueError):
+            OutputFormatter.format_as_csv([{"A": 1, "B": 2}, {"A": 3, "C": 4}])
+
 
 class TestFormatAsTsv:
     """Test format_as_tsv method."""
@@ -315,6 +434,31 @@ class TestFormatAsTxt:
         assert "Müller" in result
         assert "Schmidt" in result
 
+    def test_txt_multiple_patients_preserves_row_order(self):
+        """Test that multi-patient grouping keeps records in their original order."""
+        data = [
+            {"PatientID": 1002, "Name": "Schmidt", "Vorname": "Anna", "ICD10": "M79.1"},
+            {"PatientID": 1001, "Name": "Müller", "Vorname": "Hans", "ICD10": "E11.9"},
+            {"PatientID": 1001, "Name": "Müller", "Vorname": "Hans", "ICD10": "I10"},
+        ]
+
+        result = OutputFormatter.format_as_txt(data)
+
+        assert result.split("\n") == [
+            "Schmidt",
+            "Anna",
+            "1002",
+            "---",
+            "M79.1",
+            "---",
+            "Müller",
+            "Hans",
+            "1001",
+            "---",
+            "E11.9",
+            "I10",
+        ]
+
     def test_txt_with_empty_values(self):
         """Test text formatting filters out empty values."""
         data = [
@@ -422,6 +566,45 @@ class TestFormatAsJsonOptimized:
             assert "patient_info" in patient
             assert "diagnoses" in patient
 
+    def test_optimized_json_diagnosis_projection(self):
+        """Test that diagnosis fields are kept when None while other empty columns are dropped."""
+        data = [
+            {"PatientID": 1001, "Name": "Müller", "ICD10": "E11.9", "Bezeichnung": None, "Note": None},
+            {"PatientID": 1001, "Name": "Müller", "ICD10": "I10", "Bezeichnung": "Hypertonie", "Note": "x"},
+        ]
+
+        diagnoses = json.loads(OutputFormatter.format_as_json_optimized(data))["data"]["diagnoses"]
+
+        assert diagnoses == [
+            {"ICD10": "E11.9", "Bezeichnung": None},
+            {"ICD10": "I10", "Bezeichnung": "Hypertonie", "Note": "x"},
+        ]
+
+    def test_optimized_json_keeps_columns_missing_from_first_record(self):
+        """Test that columns only present in later records are projected too."""
+        data = [
+            {"PatientID": 1001, "Name": "Müller", "ICD10": "E11.9"},
+            {"PatientID": 1001, "Name": "Müller", "ICD10": "I10", "Note": "follow-up"},
+        ]
+
+        diagnoses = json.loads(OutputFormatter.format_as_json_optimized(data))["data"]["diagnoses"]
+
+        assert diagnoses == [{"ICD10": "E11.9"}, {"ICD10": "I10", "Note": "follow-up"}]
+
+    def test_optimized_json_groups_non_consecutive_records(self):
+        """Test that a patient's interleaved records land in one group, in first-appearance order."""
+        data = [
+            {"PatientID": 1001, "Name": "Müller", "Vorname": "Hans", "ICD10": "E11.9"},
+            {"PatientID": 1002, "Name": "Schmidt", "Vorname": "Anna", "ICD10": "M79.1"},
+            {"PatientID": 1001, "Name": "Müller", "Vorname": "Hans", "ICD10": "I10"},
+        ]
+
+        patients = json.loads(OutputFormatter.format_as_json_optimized(data))["data"]
+
+        assert [patient["patient_info"]["PatientID"] for patient in patients] == [1001, 1002]
+        assert patients[0]["diagnoses"] == [{"ICD10": "E11.9"}, {"ICD10": "I10"}]
+        assert patients[1]["diagnoses"] == [{"ICD10": "M79.1"}]
+
 
 class TestFormatAsCsvOptimized:
     """Test format_as_csv_optimized method."""
@@ -522,6 +705,44 @@ class TestFormatAsConsoleTable:
         assert "PatientID\tName" in result
         assert "1001\tMüller" in result or "Müller" in result
 
+    @patch("tbase_extractor.sql_interface.output_formatter.HAS_TABULATE", False)
+    def test_console_table_without_tabulate_single_write(self):
+        """Test that the fallback table is written to the stream in one call."""
+        data = [
+            {"PatientID": 1001, "Name": "Müller"},
+            {"PatientID": 1002, "Name": "Schmidt"},
+        ]
+        stream = Mock()
+
+        OutputFormatter.format_as_console_table(data, stream=stream)
+
+        stream.write.assert_called_once_with("PatientID\tName\n1001\tMüller\n1002\tSchmidt\n")
+
+    @patch("tbase_extractor.sql_interface.output_formatter.HAS_TABULATE", False)
+    def test_console_table_without_tabulate_ragged_rows(self):
+        """Test that fallback values stay under their headers when records have different columns."""
+        stream = Mock()
+
+        OutputFormatter.format_as_console_table([{"a": 1, "b": 2}, {"b": 3, "c": 4}], stream=stream)
+
+        stream.write.assert_called_once_with("a\tb\n1\t2\n\t3\n")
+
+    @patch("tbase_extractor.sql_interface.output_formatter.HAS_TABULATE", False)
+    def test_console_table_without_tabulate_match_candidates(self):
+        """Test the fallback table for MatchCandidate rows."""
+        candidates = [
+            MatchCandidate(
+                db_record={"Name": "Müller", "Geburtsdatum": date(1980, 5, 15)},
+                overall_score=0.95,
+                primary_match_type="Exact Match",
+            ),
+        ]
+        output = StringIO()
+
+        OutputFormatter.format_as_console_table(candidates, stream=output)
+
+        assert output.getvalue() == "Name\tDOB\tScore\tMatch Type\nMüller\t1980-05-15\t0.95\tExact Match\n"
+
 
 @pytest.mark.unit
 class TestOutputFormatterIntegration:
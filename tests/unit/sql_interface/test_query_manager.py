@@ -1,5 +1,7 @@
 """Unit tests for tbase_extractor.sql_interface.query_manager module."""
 
+import os
+from datetime import date
 from unittest.mock import Mock, patch
 
 import pytest
@@ -69,6 +71,44 @@ class TestLoadQueryTemplate:
 
         assert result == sql_content
 
+    def test_repeated_loads_return_same_string_object(self, temp_dir):
+        """Test that reloading a template yields the identical SQL string object."""
+        (temp_dir / "get_patient.sql").write_text("SELECT * FROM patients WHERE id = ?;", encoding="utf-8")
+
+        query_manager = QueryManager(temp_dir)
+
+        assert query_manager.load_query_template("get_patient") is query_manager.load_query_template("get_patient")
+
+    def test_template_read_once_until_reload(self, temp_dir):
+        """Test that a template is read from disk once and re-read after reload_templates."""
+        template_file = temp_dir / "get_patient.sql"
+        template_file.write_text("SELECT 1;", encoding="utf-8")
+        query_manager = QueryManager(temp_dir)
+
+        with patch("builtins.open", wraps=open) as mock_open:
+            query_manager.load_query_template("get_patient")
+            query_manager.load_query_template("get_patient.sql")
+        assert mock_open.call_count == 1
+
+        template_file.write_text("SELECT 2;", encoding="utf-8")
+        assert query_manager.load_query_template("get_patient") == "SELECT 1;"
+        query_manager.reload_templates()
+        assert query_manager.load_query_template("get_patient") == "SELECT 2;"
+
+    def test_missing_template_probed_once_until_reload(self, temp_dir):
+        """Test that a missing template is remembered until reload_templates."""
+        query_manager = QueryManager(temp_dir)
+
+        with patch("os.path.isfile", wraps=os.path.isfile) as mock_isfile:
+            for _ in range(3):
+                with pytest.raises(QueryTemplateNotFoundError):
+                    query_manager.load_query_template("optional_report")
+        assert mock_isfile.call_count == 1
+
+        (temp_dir / "optional_report.sql").write_text("SELECT 1;", encoding="utf-8")
+        query_manager.reload_templates()
+        assert query_manager.load_query_template("optional_report") == "SELECT 1;"
+
     def test_load_template_with_sql_extension(self, temp_dir):
         """Test loading template when .sql extension is provided."""
         sql_content = "SELECT * FROM diagnoses;"
@@ -133,106 +173,89 @@ WHERE p.PatientID = ?;"""
             query_manager.load_query_template("protected")
 
 
+# Template file name -> SQL shared by the prebuilt helper tests
+PREBUILT_TEMPLATES = {
+    "list_tables.sql": "SELECT name FROM sys.tables;",
+    "get_patient_by_id.sql": "SELECT * FROM Patient WHERE PatientID = ?;",
+    "get_patient_by_name_dob.sql": "SELECT * FROM Patient WHERE Vorname = ? AND Name = ? AND Geburtsdatum = ?;",
+    "get_patients_by_dob_year_range.sql": "SELECT * FROM Patient WHERE YEAR(Geburtsdatum) BETWEEN ? AND ?;",
+    "get_patients_by_lastname_like.sql": "SELECT * FROM Patient WHERE Name LIKE ?;",
+    "get_all_patients.sql": "SELECT * FROM Patient;",
+    "get_table_columns.sql": """SELECT COLUMN_NAME, DATA_TYPE
+                        FROM INFORMATION_SCHEMA.COLUMNS
+                        WHERE TABLE_NAME = ? AND TABLE_SCHEMA = ?;""",
+}
+
+
+@pytest.fixture(scope="class")
+def prebuilt_query_manager(tmp_path_factory):
+    """QueryManager over a directory holding every prebuilt template, shared by the class."""
+    templates_dir = tmp_path_factory.mktemp("prebuilt_templates")
+    for name, sql_content in PREBUILT_TEMPLATES.items():
+        (templates_dir / name).write_text(sql_content, encoding="utf-8")
+    return QueryManager(templates_dir)
+
+
 class TestPrebuiltQueryMethods:
     """Test prebuilt query helper methods."""
 
-    def test_get_list_tables_query(self, temp_dir):
+    def test_get_list_tables_query(self, prebuilt_query_manager):
         """Test get_list_tables_query method."""
-        sql_content = "SELECT name FROM sys.tables;"
-        template_file = temp_dir / "list_tables.sql"
-        template_file.write_text(sql_content)
-
-        query_manager = QueryManager(temp_dir)
-        query, params = query_manager.get_list_tables_query()
+        query, params = prebuilt_query_manager.get_list_tables_query()
 
-        assert query == sql_content
+        assert query == PREBUILT_TEMPLATES["list_tables.sql"]
         assert params == ()
 
-    def test_get_patient_by_id_query(self, temp_dir):
+    def test_get_patient_by_id_query(self, prebuilt_query_manager):
         """Test get_patient_by_id_query method."""
-        sql_content = "SELECT * FROM Patient WHERE PatientID = ?;"
-        template_file = temp_dir / "get_patient_by_id.sql"
-        template_file.write_text(sql_content)
+        query, params = prebuilt_query_manager.get_patient_by_id_query(1001)
 
-        query_manager = QueryManager(temp_dir)
-        query, params = query_manager.get_patient_by_id_query(1001)
-
-        assert query == sql_content
+        assert query == PREBUILT_TEMPLATES["get_patient_by_id.sql"]
         assert params == (1001,)
 
-    def test_get_patient_by_name_dob_query(self, temp_dir):
+    def test_get_patient_by_name_dob_query(self, prebuilt_query_manager):
         """Test get_patient_by_name_dob_query method."""
-        sql_content = "SELECT * FROM Patient WHERE Vorname = ? AND Name = ? AND Geburtsdatum = ?;"
-        template_file = temp_dir / "get_patient_by_name_dob.sql"
-        template_file.write_text(sql_content)
-
-        query_manager = QueryManager(temp_dir)
-        from datetime import date
-
         test_date = date(1980, 5, 15)
 
-        query, params = query_manager.get_patient_by_name_dob_query("Hans", "Müller", test_date)
+        query, params = prebuilt_query_manager.get_patient_by_name_dob_query("Hans", "Müller", test_date)
 
-        assert query == sql_content
+        assert query == PREBUILT_TEMPLATES["get_patient_by_name_dob.sql"]
         assert params == ("Hans", "Müller", test_date)
 
-    def test_get_patients_by_dob_year_range_query(self, temp_dir):
+    def test_get_patients_by_dob_year_range_query(self, prebuilt_query_manager):
         """Test get_patients_by_dob_year_range_query method."""
-        sql_content = "SELECT * FROM Patient WHERE YEAR(Geburtsdatum) BETWEEN ? AND ?;"
-        template_file = temp_dir / "get_patients_by_dob_year_range.sql"
-        template_file.write_text(sql_content)
-
-        query_manager = QueryManager(temp_dir)
-        query, params = query_manager.get_patients_by_dob_year_range_query(1980, 1990)
+        query, params = prebuilt_query_manager.get_patients_by_dob_year_range_query(1980, 1990)
 
-        assert query == sql_content
+        assert query == PREBUILT_TEMPLATES["get_patients_by_dob_year_range.sql"]
         assert params == (1980, 1990)
 
-    def test_get_patients_by_lastname_like_query(self, temp_dir):
+    def test_get_patients_by_lastname_like_query(self, prebuilt_query_manager):
         """Test get_patients_by_lastname_like_query method."""
-        sql_content = "SELECT * FROM Patient WHERE Name LIKE ?;"
-        template_file = temp_dir / "get_patients_by_lastname_like.sql"
-        template_file.write_text(sql_content)
-
-        query_manager = QueryManager(temp_dir)
-
         # Test without wildcards (should add %)
-        query, params = query_manager.get_patients_by_lastname_like_query("Mueller")
-        assert query == sql_content
+        query, params = prebuilt_query_manager.get_patients_by_lastname_like_query("Mueller")
+        assert query == PREBUILT_TEMPLATES["get_patients_by_lastname_like.sql"]
         assert params == ("Mueller%",)
 
         # Test with existing wildcards (should not modify)
-        query, params = query_manager.get_patients_by_lastname_like_query("Mue%ler")
+        query, params = prebuilt_query_manager.get_patients_by_lastname_like_query("Mue%ler")
         assert params == ("Mue%ler",)
 
         # Test with underscore wildcard
-        query, params = query_manager.get_patients_by_lastname_like_query("M_eller")
+        query, params = prebuilt_query_manager.get_patients_by_lastname_like_query("M_eller")
         assert params == ("M_eller",)
 
-    def test_get_all_patients_query(self, temp_dir):
+    def test_get_all_patients_query(self, prebuilt_query_manager):
         """Test get_all_patients_query method."""
-        sql_content = "SELECT * FROM Patient;"
-        template_file = temp_dir / "get_all_patients.sql"
-        template_file.write_text(sql_content)
+        query, params = prebuilt_query_manager.get_all_patients_query()
 
-        query_manager = QueryManager(temp_dir)
-        query, params = query_manager.get_all_patients_query()
-
-        assert query == sql_content
+        assert query == PREBUILT_TEMPLATES["get_all_patients.sql"]
         assert params == ()
 
-    def test_get_table_columns_query(self, temp_dir):
+    def test_get_table_columns_query(self, prebuilt_query_manager):
         """Test get_table_columns_query method."""
-        sql_content = """SELECT COLUMN_NAME, DATA_TYPE
-                        FROM INFORMATION_SCHEMA.COLUMNS
-                        WHERE TABLE_NAME = ? AND TABLE_SCHEMA = ?;"""
-        template_file = temp_dir / "get_table_columns.sql"
-        template_file.write_text(sql_content)
-
-        query_manager = QueryManager(temp_dir)
-        query, params = query_manager.get_table_columns_query("Patient", "dbo")
+        query, params = prebuilt_query_manager.get_table_columns_query("Patient", "dbo")
 
-        assert query == sql_content
+        assert query == PREBUILT_TEMPLATES["get_table_columns.sql"]
         assert params == ("Patient", "dbo")
 
 
@@ -1,5 +1,7 @@
 """Unit tests for tbase_extractor.config module."""
 
+from collections.abc import Mapping
+
 import pytest
 
 from tbase_extractor.config import (
@@ -46,8 +48,8 @@ class TestConfigConstants:
         assert "%d" in DOB_FORMAT  # Should include day
 
     def test_valid_output_formats(self):
-        """Test output formats list is properly defined."""
-        assert isinstance(VALID_OUTPUT_FORMATS, list)
+        """Test output formats collection is properly defined."""
+        assert VALID_OUTPUT_FORMATS == ("json", "csv", "tsv", "txt", "stdout")
         assert len(VALID_OUTPUT_FORMATS) > 0
         assert "json" in VALID_OUTPUT_FORMATS
         assert "csv" in VALID_OUTPUT_FORMATS
@@ -55,7 +57,9 @@ class TestConfigConstants:
 
     def test_file_extension_map(self):
         """Test file extension mapping is consistent."""
-        assert isinstance(FILE_EXTENSION_MAP, dict)
+        assert isinstance(FILE_EXTENSION_MAP, Mapping)
+        with pytest.raises(TypeError):
+            FILE_EXTENSION_MAP[".xml"] = "xml"  # type: ignore[index]
 
         # Check that all mapped formats are in valid formats
         for ext, format_name in FILE_EXTENSION_MAP.items():
@@ -64,7 +68,7 @@ class TestConfigConstants:
 
     def test_valid_filename_chars(self):
         """Test valid filename characters set."""
-        assert isinstance(VALID_FILENAME_CHARS, set)
+        assert isinstance(VALID_FILENAME_CHARS, (set, frozenset))
         assert len(VALID_FILENAME_CHARS) > 0
 
         # Should include alphanumeric
@@ -178,6 +182,10 @@ class TestSanitizeFilename:
             result = sanitize_filename(input_name)
             assert result == expected, f"Failed for input: {input_name}"
 
+    def test_filename_non_ascii_removed(self):
+        """Test that non-ASCII letters and digits are removed like any other invalid character."""
+        assert sanitize_filename("Müller_Jörg-٣²\n\t") == "Mller_Jrg-"
+
 
 @pytest.mark.unit
 class TestConfigIntegration:
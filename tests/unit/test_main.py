@@ -0,0 +1,61 @@
+"""Unit tests for tbase_extractor.main argument parsing."""
+
+from unittest.mock import patch
+
+import pytest
+
+from tbase_extractor.main import main, setup_arg_parser
+
+
+class TestSetupArgParser:
+    """Test the CLI parser in-process instead of spawning the module."""
+
+    def test_query_by_id(self):
+        """Test parsing a patient-by-ID query."""
+        args = setup_arg_parser().parse_args(["query", "--query-name", "get_patient_by_id", "--patient-id", "42"])
+        assert args.action == "query"
+        assert args.query_name == "get_patient_by_id"
+        assert args.debug is False
+
+    def test_list_tables_defaults(self):
+        """Test list-tables defaults."""
+        args = setup_arg_parser().parse_args(["list-tables"])
+        assert args.action == "list-tables"
+        assert args.schema == "dbo"
+        assert args.use_dynamic_builder is False
+
+    def test_invalid_query_name_exits(self):
+        """Test that unknown query names are rejected by argparse."""
+        with pytest.raises(SystemExit):
+            setup_arg_parser().parse_args(["query", "--query-name", "nonexistent"])
+
+
+class TestMainArgv:
+    """Test that main() accepts an explicit argument list."""
+
+    def test_main_parses_given_argv(self):
+        """Test main() uses argv rather than sys.argv."""
+        with patch("tbase_extractor.main.resolve_templates_dir", return_value="templates"), patch(
+            "sys.argv",
+            ["tbase-extractor", "list-tables"],
+        ), pytest.raises(SystemExit) as exc_info:
+            main(["query"])
+        # "query" without --query-name is an argparse usage error
+        assert exc_info.value.code == 2
+
+
+class TestCliHelp:
+    """Test --help output in-process; the module entry point is checked in tests/integration."""
+
+    @pytest.mark.parametrize(
+        "command",
+        [[], ["list-tables"], ["query"], ["discover-patient-tables"], ["query-custom-tables"]],
+        ids=["main", "list-tables", "query", "discover-patient-tables", "query-custom-tables"],
+    )
+    def test_help_exits_cleanly(self, command, capsys):
+        """Test that --help prints usage and exits with status 0."""
+        with pytest.raises(SystemExit) as exc_info:
+            setup_arg_parser().parse_args([*command, "--help"])
+
+        assert exc_info.value.code == 0
+        assert "usage" in capsys.readouterr().out